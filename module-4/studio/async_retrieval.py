@@ -0,0 +1,57 @@
+import asyncio
+from typing import List
+
+import httpx
+
+from langchain_core.documents import Document
+
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+
+async def aload_wikipedia(query: str, load_max_docs: int = 2, doc_content_chars_max: int = 4000) -> List[Document]:
+
+    """ Async counterpart of WikipediaLoader(query, load_max_docs).load()
+
+    Searches with one MediaWiki API request, then fetches each page's
+    plain-text extract concurrently (TextExtracts returns only one full
+    extract per request), so the call can be awaited on the event loop
+    instead of being pushed to a worker thread.
+    """
+
+    search = {
+        "action": "query",
+        "format": "json",
+        "list": "search",
+        "srsearch": query,
+        "srlimit": load_max_docs,
+        "srprop": "",
+    }
+    async with httpx.AsyncClient(timeout=30, headers={"User-Agent": "langchain-academy"}) as client:
+
+        async def get(params):
+            response = await client.get(WIKIPEDIA_API, params=params)
+            response.raise_for_status()
+            return response.json()
+
+        # Search results come back in ranking order
+        results = (await get(search)).get("query", {}).get("search", [])
+
+        async def fetch(pageid):
+            pages = (await get({
+                "action": "query",
+                "format": "json",
+                "pageids": pageid,
+                "prop": "extracts|info",
+                "explaintext": 1,
+                "inprop": "url",
+            })).get("query", {}).get("pages", {})
+            return pages.get(str(pageid), {})
+
+        pages = await asyncio.gather(*(fetch(result["pageid"]) for result in results))
+
+    return [
+        Document(
+            page_content=page.get("extract", "")[:doc_content_chars_max],
+            metadata={"title": page.get("title", result["title"]), "source": page.get("fullurl", "")},
+        )
+        for result, page in zip(results, pages)
+    ]
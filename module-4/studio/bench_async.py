@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+bench_async.py
+
+Compare thread-backed and async execution of the parallelization graph at
+high concurrency. The model, Tavily and Wikipedia are replaced with stubs
+that only wait (time.sleep or asyncio.sleep), so the benchmark runs offline
+and measures scheduling overhead rather than upstream latency.
+
+Usage:
+  python3 bench_async.py --requests 500 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "unused-by-benchmark")
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+import parallelization
+
+
+class StubModel:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, messages, config=None):
+        time.sleep(self.latency)
+        return AIMessage(content="stub answer")
+
+    async def ainvoke(self, messages, config=None):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="stub answer")
+
+
+def install_stubs(latency: float):
+    """Swap the graph's upstreams for stubs with a fixed latency."""
+    docs = [{"url": "https://example.com", "content": "stub"}]
+
+    class StubTavily:
+        def __init__(self, max_results=3):
+            pass
+
+        def invoke(self, query):
+            time.sleep(latency)
+            return docs
+
+        async def ainvoke(self, query):
+            await asyncio.sleep(latency)
+            return docs
+
+    class StubWikipediaLoader:
+        def __init__(self, query, load_max_docs=2):
+            pass
+
+        def load(self):
+            time.sleep(latency)
+            return [Document(page_content="stub", metadata={"source": "https://en.wikipedia.org"})]
+
+    async def stub_aload_wikipedia(query, load_max_docs=2):
+        await asyncio.sleep(latency)
+        return [Document(page_content="stub", metadata={"source": "https://en.wikipedia.org"})]
+
+    parallelization.llm = StubModel(latency)
+    parallelization.TavilySearchResults = StubTavily
+    parallelization.WikipediaLoader = StubWikipediaLoader
+    parallelization.aload_wikipedia = stub_aload_wikipedia
+
+
+async def run(graph, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await graph.ainvoke({"question": f"question {i}"})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread-backed vs async nodes for parallelization.py")
+    parser.add_argument("--requests", type=int, default=500, help="Graph invocations per mode")
+    parser.add_argument("--concurrency", type=int, default=200, help="Invocations in flight at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per upstream call")
+    args = parser.parse_args()
+
+    install_stubs(args.latency)
+    modes = {
+        "threads": parallelization.build_graph(async_nodes=False),
+        "async": parallelization.build_graph(async_nodes=True),
+    }
+
+    # Each request makes two parallel retrievals and then one model call
+    ideal = args.requests / args.concurrency * 2 * args.latency
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.latency}s per upstream call (ideal ~{ideal:.2f}s)")
+    for name, graph in modes.items():
+        elapsed = asyncio.run(run(graph, args.requests, args.concurrency))
+        print(f"{name:>8}: {elapsed:6.2f}s  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
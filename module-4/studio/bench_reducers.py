@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+bench_reducers.py
+
+Compare Annotated[list, operator.add] with Annotated[list, ChunkedListChannel]
+for a fan-in list key. Each update appends one item, as one Send() branch
+would, and the results of all branches land in the same superstep, after
+which the node following the fan-in reads the value once.
+
+operator.add copies the whole list on every update, so total time grows with
+the square of the number of updates; ChunkedListChannel should grow linearly.
+
+Usage:
+  python3 bench_reducers.py --updates 10000 20000 40000 80000
+"""
+import argparse
+import operator
+import time
+
+from langgraph.channels.binop import BinaryOperatorAggregate
+
+from chunked import ChunkedListChannel
+
+
+def fan_in(make_channel, updates: int, item_size: int, repeat: int = 3) -> float:
+    """Best of `repeat` supersteps of `updates` single-item updates plus one read."""
+    item = "x" * item_size
+    writes = [[item] for _ in range(updates)]
+    best = float("inf")
+    for _ in range(repeat):
+        channel = make_channel()
+        start = time.perf_counter()
+        channel.update(writes)
+        assert len(channel.get()) == updates
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="operator.add vs ChunkedListChannel for fan-in list keys")
+    parser.add_argument("--updates", type=int, nargs="+", default=[10000, 20000, 40000, 80000])
+    parser.add_argument("--item-size", type=int, default=32, help="Characters per appended item")
+    args = parser.parse_args()
+
+    channels = {
+        "operator.add": lambda: BinaryOperatorAggregate(list, operator.add),
+        "ChunkedListChannel": lambda: ChunkedListChannel(list),
+    }
+
+    print(f"{'updates':>8}  " + "  ".join(f"{name:>22}" for name in channels))
+    previous = {}
+    for updates in args.updates:
+        row = []
+        for name, make_channel in channels.items():
+            elapsed = fan_in(make_channel, updates, args.item_size)
+            # Growth vs the previous size: ~2x per doubling is linear, ~4x is quadratic
+            growth = f"x{elapsed / previous[name]:.1f}" if name in previous else ""
+            previous[name] = elapsed
+            row.append(f"{elapsed * 1000:9.1f}ms {growth:>6} ")
+        print(f"{updates:>8}  " + "  ".join(f"{cell:>22}" for cell in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# Matches [1], [12] and [1, 2] citation markers
+CITATION_MARKER = re.compile(r"\[(\d+(?:\s*,\s*\d+)*)\]")
+
+# Matches a "[1] Source" line in a Sources section
+SOURCE_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.+?)\s*$")
+
+# Matches the Sources header written by section and report writers
+SOURCES_HEADER = re.compile(r"^#{2,3}\s*Sources\s*$", re.MULTILINE)
+
+def split_sources(text: str) -> Tuple[str, List[Tuple[int, str]]]:
+    """ Split markdown into its body and the (number, source) pairs of its Sources section """
+
+    headers = list(SOURCES_HEADER.finditer(text))
+    if not headers:
+        return text, []
+
+    # Use the last Sources header, anything after it is the source list
+    header = headers[-1]
+    body = text[:header.start()].rstrip()
+    sources = []
+    for line in text[header.end():].splitlines():
+        match = SOURCE_LINE.match(line)
+        if match:
+            sources.append((int(match.group(1)), match.group(2)))
+    return body, sources
+
+def replace_markers(text: str, mapping: dict) -> str:
+    """ Rewrite [n] markers through mapping, leaving unknown numbers untouched """
+
+    def _sub(match):
+        numbers = [int(n) for n in match.group(1).split(",")]
+        renumbered = []
+        for n in numbers:
+            new = mapping.get(n, n)
+            if new not in renumbered:
+                renumbered.append(new)
+        return "".join(f"[{n}]" for n in renumbered)
+
+    return CITATION_MARKER.sub(_sub, text)
+
+def normalize_source(source: str) -> str:
+    """ Dedup key for a source: URLs ignore scheme, www., fragment and trailing slash """
+
+    source = source.strip()
+    parts = urlsplit(source)
+    if parts.scheme in ("http", "https") and parts.netloc:
+        netloc = parts.netloc.lower().removeprefix("www.")
+        path = parts.path.rstrip("/")
+        return urlunsplit(("", netloc, path, parts.query, "")).lstrip("/")
+    return source.rstrip("/")
+
+def source_label(source: str, page: Optional[str] = None) -> str:
+    """ Render a source the way reports cite it, e.g. docs/llama3_1.pdf, page 7 """
+    return f"{source}, page {page}" if page not in (None, "") else source
+
+class CitationRegistry:
+    """Report-wide, deduplicated list of sources.
+
+    Each source gets a number the first time it is added; adding the same
+    URL or path again (after normalization) returns the existing number, so
+    building the registry and renumbering citations is one dict pass.
+    """
+
+    def __init__(self):
+        self._numbers: Dict[str, int] = {}
+        self._labels: List[str] = []
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, source: str, page: Optional[str] = None) -> int:
+        """ Register a source and return its citation number """
+        label = source_label(source, page)
+        key = normalize_source(label)
+        if key not in self._numbers:
+            self._labels.append(label)
+            self._numbers[key] = len(self._labels)
+        return self._numbers[key]
+
+    def add_records(self, records: List[dict]) -> List[int]:
+        """ Register source records ({"source": ..., "page": ...}) in order """
+        return [self.add(record["source"], record.get("page")) for record in records]
+
+    def add_section(self, section: str) -> str:
+        """ Register a section's sources and return its body with report-wide citations """
+        body, section_sources = split_sources(section)
+        mapping = {n: self.add(source) for n, source in section_sources}
+        return replace_markers(body, mapping)
+
+    def cited(self, text: str) -> Tuple[str, "CitationRegistry"]:
+        """ Keep only the sources text cites, renumbered in order of first citation """
+        compact = CitationRegistry()
+        mapping = {}
+        for match in CITATION_MARKER.finditer(text):
+            for n in (int(n) for n in match.group(1).split(",")):
+                if 1 <= n <= len(self._labels) and n not in mapping:
+                    mapping[n] = compact.add(self._labels[n - 1])
+        return replace_markers(text, mapping), compact
+
+    def sources(self) -> List[str]:
+        """ Source labels in citation order """
+        return list(self._labels)
+
+    def render(self) -> str:
+        return format_sources(self._labels)
+
+def renumber_sections(sections: List[str]) -> Tuple[List[str], List[str]]:
+    """ Give every section's citations a report-wide number.
+
+    Each section numbers its sources from [1]. This maps them onto one
+    deduplicated registry so the bodies can be merged without the numbers
+    colliding, and returns the bodies (without their Sources sections) plus
+    the report-wide source list.
+    """
+
+    registry = CitationRegistry()
+    bodies = [registry.add_section(section) for section in sections]
+    return bodies, registry.sources()
+
+def format_sources(sources: List[str]) -> str:
+    """ Render a numbered source list, one per markdown line """
+    return "\n".join(f"[{i}] {source}  " for i, source in enumerate(sources, start=1))
@@ -0,0 +1,38 @@
+import os
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+@dataclass(kw_only=True)
+class Configuration:
+    """The configurable fields for the module-4 graphs: research_assistant, map_reduce, parallelization and sub_graphs."""
+    report_mode: str = "barrier" # "barrier" waits for every interview, "incremental" folds sections in as they finish
+    straggler_deadline: Optional[float] = None # Seconds to wait for interviews before finalizing with what has arrived
+    min_sections: Optional[int] = None # Sections required before the straggler deadline may cut the rest
+    fanout_window: Optional[int] = None # Cap on interviews in flight; new ones start as others finish (map_reduce: use max_concurrency in the run config)
+    report_token_budget: int = 50000 # Above this many (estimated) tokens of sections, write_report tree-reduces them
+    reduce_concurrency: int = 8 # Parallel LLM calls per level of the tree reduce
+    retrieval_deadline: Optional[float] = None # Seconds each retrieval branch may take before it is dropped
+    hedge_percentile: Optional[float] = None # Issue a duplicate retrieval once a call is slower than this latency percentile
+    joke_mode: str = "per_subject" # "per_subject", "batch" (model.batch per micro-batch) or "list" (one structured call per micro-batch)
+    joke_batch_size: int = 10 # Subjects per micro-batch in the batched joke modes
+    joke_max_concurrency: int = 8 # Concurrent model calls within one micro-batch in "batch" mode
+    selection_group_size: int = 8 # Jokes compared per call in best_joke; larger sets run as a knockout bracket
+    log_mode: str = "full" # "full" analyzes every log given, "incremental" skips logs analyzed in earlier runs (needs a store)
+    log_pipeline_id: str = "default" # Store namespace for the incremental log analysis watermark
+
+    @classmethod
+    def from_runnable_config(
+        cls, config: Optional[RunnableConfig] = None
+    ) -> "Configuration":
+        """Create a Configuration instance from a RunnableConfig."""
+        configurable = (
+            config["configurable"] if config and "configurable" in config else {}
+        )
+        values: dict[str, Any] = {
+            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            for f in fields(cls)
+            if f.init
+        }
+        return cls(**{k: v for k, v in values.items() if v})
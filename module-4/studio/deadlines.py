@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional, Tuple
+
+# Shared pool for deadline-bounded calls. Threads can't be cancelled, so an attempt that misses its
+# deadline or loses a hedge keeps its thread until the upstream call returns. _slots counts the
+# attempts holding a thread: new attempts wait (at most until their deadline) for a free slot, and
+# hedges are skipped when none is free, so stragglers can't queue up unbounded work behind them.
+POOL_SIZE = 32
+_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="deadline")
+_slots = threading.BoundedSemaphore(POOL_SIZE)
+
+class LatencyTracker:
+    """Rolling window of call latencies for one upstream, used to pick a hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """ Latency at percentile p (0-100), or None until enough samples exist """
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(len(samples) * p / 100), len(samples) - 1)
+        return samples[index]
+
+def call_with_deadline(fn: Callable,
+                       deadline: Optional[float] = None,
+                       hedge_after: Optional[float] = None,
+                       tracker: Optional[LatencyTracker] = None) -> Tuple[bool, object]:
+    """ Call fn() with a time budget, optionally hedging with a duplicate call.
+
+    Returns (True, result) from whichever attempt finishes first, or
+    (False, None) if no attempt finished within the deadline. If hedge_after
+    seconds pass without a result, a second identical call is issued and the
+    first of the two to complete wins. Errors are raised as usual.
+
+    Attempts run on a shared pool of POOL_SIZE threads, in a copy of the
+    caller's context so the run config (tracing, callbacks) follows them.
+    """
+
+    def timed():
+        start = time.monotonic()
+        result = fn()
+        if tracker is not None:
+            tracker.record(time.monotonic() - start)
+        return result
+
+    def submit():
+        # The slot is held until the attempt finishes, even after the caller has given up on it
+        def run():
+            try:
+                return timed()
+            finally:
+                _slots.release()
+        return _pool.submit(contextvars.copy_context().run, run)
+
+    # Nothing to bound: call inline rather than hopping to the pool
+    if deadline is None and hedge_after is None:
+        return True, timed()
+
+    start = time.monotonic()
+    if not _slots.acquire(timeout=deadline):
+        # Every thread is busy with stragglers for the whole budget
+        return False, None
+    attempts = {submit()}
+
+    # Wait for the primary until it is time to hedge
+    if hedge_after is not None and (deadline is None or hedge_after < deadline):
+        done, _ = wait(attempts, timeout=hedge_after)
+        # Only hedge with a spare thread, never by waiting for one
+        if not done and _slots.acquire(blocking=False):
+            attempts.add(submit())
+
+    # Then wait out the rest of the budget for either attempt
+    while attempts:
+        remaining = None if deadline is None else max(deadline - (time.monotonic() - start), 0)
+        done, attempts = wait(attempts, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            return False, None
+        for attempt in done:
+            if attempt.exception() is None:
+                return True, attempt.result()
+        # A failed attempt should not mask the other one still in flight
+        if not attempts:
+            raise next(iter(done)).exception()
+    return False, None
+
+async def acall_with_deadline(fn: Callable,
+                              deadline: Optional[float] = None,
+                              hedge_after: Optional[float] = None,
+                              tracker: Optional[LatencyTracker] = None) -> Tuple[bool, object]:
+    """ Async variant of call_with_deadline() where fn returns an awaitable.
+
+    Unlike threads, attempts that lose the race or miss the deadline are cancelled.
+    """
+
+    async def timed():
+        start = time.monotonic()
+        result = await fn()
+        if tracker is not None:
+            tracker.record(time.monotonic() - start)
+        return result
+
+    if deadline is None and hedge_after is None:
+        return True, await timed()
+
+    start = time.monotonic()
+    attempts = {asyncio.ensure_future(timed())}
+    try:
+        # Wait for the primary until it is time to hedge
+        if hedge_after is not None and (deadline is None or hedge_after < deadline):
+            done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+            if not done:
+                attempts.add(asyncio.ensure_future(timed()))
+
+        # Then wait out the rest of the budget for either attempt
+        while attempts:
+            remaining = None if deadline is None else max(deadline - (time.monotonic() - start), 0)
+            done, attempts = await asyncio.wait(attempts, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                return False, None
+            for attempt in done:
+                if attempt.exception() is None:
+                    return True, attempt.result()
+            # A failed attempt should not mask the other one still in flight
+            if not attempts:
+                raise next(iter(done)).exception()
+        return False, None
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
@@ -0,0 +1,255 @@
+import json
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Optional Log fields, tracked with a presence mask so records round-trip exactly
+OPTIONAL_FIELDS = ("docs", "grade", "grader", "feedback")
+
+def read_jsonl(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[dict]:
+    """ Yield the JSON records on the lines between byte offsets start and end """
+    with open(path, "rb") as f:
+        f.seek(start)
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+def complete_size(path: str) -> int:
+    """ Byte offset just past the last complete line, so a line still being appended is left for later """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        while size:
+            f.seek(max(size - 65536, 0))
+            block = f.read(size - f.tell())
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return size - len(block) + newline + 1
+            size -= len(block)
+    return 0
+
+class StringColumn:
+    """UTF-8 strings packed into one byte buffer plus offsets, Arrow-style.
+
+    Row i is data[offsets[i]:offsets[i + 1]], or None where valid[i] is False.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, valid: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.valid = valid
+
+    def get(self, row: int) -> Optional[str]:
+        if not self.valid[row]:
+            return None
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+class CategoryColumn:
+    """Dictionary-encoded strings for low-cardinality fields, so grouping is integer work.
+
+    Row i is categories[codes[i]], or None where codes[i] is -1.
+    """
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = list(categories)
+
+    def get(self, row: int) -> Optional[str]:
+        code = self.codes[row]
+        return None if code < 0 else self.categories[code]
+
+class ObjectColumn:
+    """Python values kept as they are, for nested fields such as docs."""
+
+    def __init__(self, values: list):
+        self.values = values
+
+    def get(self, row: int):
+        return self.values[row]
+
+class _StringBuilder:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.valid = bytearray()
+
+    def append(self, value: Optional[str]):
+        if value is not None:
+            self.data += str(value).encode("utf-8")
+        self.offsets.append(len(self.data))
+        self.valid.append(value is not None)
+
+    def build(self) -> StringColumn:
+        return StringColumn(np.frombuffer(bytes(self.data), dtype=np.uint8),
+                            np.frombuffer(self.offsets, dtype=np.int64).copy(),
+                            np.frombuffer(bytes(self.valid), dtype=np.bool_))
+
+class _CategoryBuilder:
+    def __init__(self):
+        self.codes = array("i")
+        self.lookup = {}
+
+    def append(self, value: Optional[str]):
+        if value is None:
+            self.codes.append(-1)
+        else:
+            self.codes.append(self.lookup.setdefault(value, len(self.lookup)))
+
+    def build(self) -> CategoryColumn:
+        return CategoryColumn(np.frombuffer(self.codes, dtype=np.int32).copy(), list(self.lookup))
+
+class LogTable:
+    """Columnar, read-only collection of Log records.
+
+    Records are stored as NumPy arrays (packed UTF-8 for text, float64 for
+    grades, dictionary codes for the grader) instead of one dict per log;
+    docs are kept as the original Python values.
+    Filtering and grouping return views that share the columns and only
+    carry an array of selected row numbers, so taking a subset copies no
+    log data.
+
+    Iterating or indexing yields Log dicts built on demand, so code written
+    against List[Log] keeps working. Tables are built inside nodes; graph
+    state keeps List[Log], so schemas and checkpoints see plain records.
+    """
+
+    def __init__(self, columns: Dict[str, Union[np.ndarray, StringColumn, CategoryColumn, ObjectColumn]], rows: Optional[np.ndarray] = None):
+        self.columns = columns
+        self.rows = rows
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "LogTable":
+        """ Build a table from Log dicts, e.g. the raw_logs graph input """
+
+        builders = {
+            "id": _StringBuilder(),
+            "question": _StringBuilder(),
+            "answer": _StringBuilder(),
+            "grader": _CategoryBuilder(),
+            "feedback": _StringBuilder(),
+        }
+        docs = []
+        grades = array("d")
+        present = {field: bytearray() for field in OPTIONAL_FIELDS}
+
+        for record in records:
+            builders["id"].append(record["id"])
+            builders["question"].append(record.get("question"))
+            builders["answer"].append(record.get("answer"))
+            docs.append(record.get("docs"))
+            builders["grader"].append(record.get("grader"))
+            builders["feedback"].append(record.get("feedback"))
+            grade = record.get("grade")
+            grades.append(np.nan if grade is None else float(grade))
+            for field in OPTIONAL_FIELDS:
+                present[field].append(field in record)
+
+        columns = {name: builder.build() for name, builder in builders.items()}
+        columns["docs"] = ObjectColumn(docs)
+        columns["grade"] = np.frombuffer(grades, dtype=np.float64).copy()
+        for field in OPTIONAL_FIELDS:
+            columns[f"has_{field}"] = np.frombuffer(bytes(present[field]), dtype=np.bool_)
+        return cls(columns)
+
+    @classmethod
+    def from_jsonl(cls, paths: Union[str, Iterable[str]]) -> "LogTable":
+        """ Stream Log records from one or more JSONL files straight into columns """
+
+        if isinstance(paths, str):
+            paths = [paths]
+        return cls.from_records(record for path in paths for record in read_jsonl(path))
+
+    @classmethod
+    def tail_jsonl(cls, paths: Iterable[str], offsets: Dict[str, int]) -> Tuple["LogTable", Dict[str, int]]:
+        """ Read only the complete lines appended to each file since offsets[path].
+
+        Returns the table and the new offsets to resume from next time.
+        """
+
+        ends = {}
+        def records():
+            for path in paths:
+                ends[path] = complete_size(path)
+                start = offsets.get(path, 0)
+                # A file that shrank was rotated, so read it from the top
+                yield from read_jsonl(path, start if start <= ends[path] else 0, ends[path])
+
+        return cls.from_records(records()), ends
+
+    def __len__(self):
+        return len(self.columns["id"].valid) if self.rows is None else len(self.rows)
+
+    def _physical_rows(self) -> np.ndarray:
+        return np.arange(len(self)) if self.rows is None else self.rows
+
+    def _record(self, row: int) -> dict:
+        columns = self.columns
+        record = {"id": columns["id"].get(row),
+                  "question": columns["question"].get(row),
+                  "answer": columns["answer"].get(row)}
+        if columns["has_docs"][row]:
+            record["docs"] = columns["docs"].get(row)
+        if columns["has_grade"][row]:
+            grade = columns["grade"][row]
+            record["grade"] = None if np.isnan(grade) else int(grade)
+        if columns["has_grader"][row]:
+            record["grader"] = columns["grader"].get(row)
+        if columns["has_feedback"][row]:
+            record["feedback"] = columns["feedback"].get(row)
+        return record
+
+    def __getitem__(self, index: int) -> dict:
+        return self._record(int(self._physical_rows()[index]))
+
+    def __iter__(self) -> Iterator[dict]:
+        for row in self._physical_rows():
+            yield self._record(int(row))
+
+    def __repr__(self):
+        return f"LogTable({len(self)} logs)"
+
+    @property
+    def ids(self) -> List[str]:
+        """ Log ids of the selected rows, without building the full records """
+        column = self.columns["id"]
+        return [column.get(int(row)) for row in self._physical_rows()]
+
+    @property
+    def grades(self) -> np.ndarray:
+        """ Grades of the selected rows, NaN where there is none """
+        return self.columns["grade"] if self.rows is None else self.columns["grade"][self.rows]
+
+    def select(self, mask: np.ndarray) -> "LogTable":
+        """ View of the rows where mask (aligned with this table) is True """
+        return LogTable(self.columns, self._physical_rows()[mask])
+
+    def failures(self) -> "LogTable":
+        """ View of the logs that were graded, i.e. that contain a "grade" key """
+        has_grade = self.columns["has_grade"]
+        return self.select(has_grade if self.rows is None else has_grade[self.rows])
+
+    def group_by(self, field: str) -> Dict[object, "LogTable"]:
+        """ Split into one view per distinct value of grader or grade, in a single sort """
+
+        rows = self._physical_rows()
+        column = self.columns[field]
+        if isinstance(column, CategoryColumn):
+            keys = column.codes[rows]
+            label = lambda key: None if key < 0 else column.categories[key]
+        elif field == "grade":
+            keys = np.where(self.columns["has_grade"][rows], column[rows], -np.inf)
+            label = lambda key: None if not np.isfinite(key) else int(key)
+        else:
+            raise ValueError(f"Cannot group logs by {field!r}")
+
+        if not len(rows):
+            return {}
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        return {label(sorted_keys[start]): LogTable(self.columns, rows[group])
+                for start, group in zip(starts, np.split(order, starts[1:]))}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+log_windows.py
+
+Run the sub_graphs entry graph over JSONL log files in fixed-size windows.
+
+Each window of --window-size lines is one entry graph invocation in a worker
+process. Workers read their own byte range of the file, so only window
+boundaries cross process lines, and at most 2 * --max-workers windows are
+in flight, which bounds peak memory by the window size rather than by the
+total log volume.
+
+Window results are folded with combine(), which is associative, in file
+order, so the merged output does not depend on how many workers ran or in
+which order windows finished.
+
+Usage:
+  python3 log_windows.py logs/*.jsonl --window-size 50000 --max-workers 8 --output summary.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator
+
+from log_columns import read_jsonl
+from processed import ProcessedLogs, union_processed
+from sub_graphs import graph, merge_summary
+
+
+def window_ranges(paths: list[str], window_size: int) -> Iterator[tuple[str, int, int]]:
+    """Yield (path, start, end) byte ranges covering window_size lines each, without parsing."""
+    for path in paths:
+        with open(path, "rb") as f:
+            start = f.tell()
+            lines = 0
+            for line in iter(f.readline, b""):
+                if line.strip():
+                    lines += 1
+                if lines == window_size:
+                    end = f.tell()
+                    yield path, start, end
+                    start, lines = end, 0
+            if lines:
+                yield path, start, f.tell()
+
+
+def run_window(path: str, start: int, end: int) -> dict:
+    """Run the entry graph on one window; executed in a worker process."""
+    logs = list(read_jsonl(path, start, end))
+    result = graph.invoke({"raw_logs": logs})
+    return {
+        "logs": len(logs),
+        "fa_summary": result.get("fa_summary", ""),
+        "report": result.get("report", ""),
+        # Packed again for the trip back to the parent process
+        "processed_logs": ProcessedLogs.from_entries(result.get("processed_logs", [])),
+    }
+
+
+def combine(left: dict, right: dict) -> dict:
+    """Associative merge of two window results (or of already merged results)."""
+    return {
+        "logs": left["logs"] + right["logs"],
+        "fa_summary": merge_summary(left["fa_summary"], right["fa_summary"]),
+        "report": merge_summary(left["report"], right["report"]),
+        "processed_logs": union_processed(left["processed_logs"], right["processed_logs"]),
+    }
+
+
+EMPTY = {"logs": 0, "fa_summary": "", "report": "", "processed_logs": ProcessedLogs()}
+
+
+def run_windowed(paths: list[str], window_size: int = 50000, max_workers: int | None = None) -> dict:
+    """Run the entry graph window by window across a process pool and merge the results."""
+    max_workers = max_workers or os.cpu_count() or 1
+    ranges = window_ranges(paths, window_size)
+    merged = EMPTY
+    finished = {}  # window index -> result, waiting for earlier windows
+    next_index = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        submitted = 0
+        exhausted = False
+        while True:
+            # Keep the pool busy without reading ahead of it
+            while not exhausted and len(pending) < 2 * max_workers:
+                window = next(ranges, None)
+                if window is None:
+                    exhausted = True
+                    break
+                pending[pool.submit(run_window, *window)] = submitted
+                submitted += 1
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+
+            # Fold in file order, as soon as the next window is available
+            while next_index in finished:
+                merged = combine(merged, finished.pop(next_index))
+                next_index += 1
+
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the sub_graphs entry graph over JSONL logs in windows")
+    parser.add_argument("paths", nargs="+", help="JSONL files, one Log per line")
+    parser.add_argument("--window-size", type=int, default=50000, help="Logs per entry graph invocation")
+    parser.add_argument("--max-workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", help="Write the merged result as JSON here instead of stdout")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    merged = run_windowed(args.paths, args.window_size, args.max_workers)
+    elapsed = time.perf_counter() - start
+
+    result = dict(merged, processed_logs=list(merged["processed_logs"]))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+    else:
+        print(json.dumps({k: v for k, v in result.items() if k != "processed_logs"}, indent=2))
+    print(f"{merged['logs']} logs, {len(merged['processed_logs'])} processed entries in {elapsed:.1f}s "
+          f"({merged['logs'] / max(elapsed, 1e-9):.0f} logs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,21 @@
-import operator
 from typing import Annotated
 from typing_extensions import TypedDict
 
 from pydantic import BaseModel
 
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI 
 
 from langgraph.constants import Send
 from langgraph.graph import END, StateGraph, START
 
+import configuration
+from chunked import ChunkedListChannel
+
 # Prompts we will use
 subjects_prompt = """Generate a list of 3 sub-topics that are all related to this overall topic: {topic}."""
 joke_prompt = """Generate a joke about {subject}"""
+jokes_prompt = """Generate one joke for each of these subjects, in the same order. Return exactly {n} jokes. Subjects: \n\n  {subjects}"""
 best_joke_prompt = """Below are a bunch of jokes about {topic}. Select the best one! Return the ID of the best one, starting 0 as the ID for the first joke. Jokes: \n\n  {jokes}"""
 
 # LLM
@@ -27,7 +31,7 @@ class BestJoke(BaseModel):
 class OverallState(TypedDict):
     topic: str
     subjects: list
-    jokes: Annotated[list, operator.add]
+    jokes: Annotated[list, ChunkedListChannel]
     best_selected_joke: str
 
 def generate_topics(state: OverallState):
@@ -46,23 +50,95 @@ def generate_joke(state: JokeState):
     response = model.with_structured_output(Joke).invoke(prompt)
     return {"jokes": [response.joke]}
 
-def best_joke(state: OverallState):
-    jokes = "\n\n".join(state["jokes"])
-    prompt = best_joke_prompt.format(topic=state["topic"], jokes=jokes)
-    response = model.with_structured_output(BestJoke).invoke(prompt)
-    return {"best_selected_joke": state["jokes"][response.id]}
+class JokeBatchState(TypedDict):
+    subjects: list
+
+class Jokes(BaseModel):
+    jokes: list[str]
+
+def generate_joke_batch(state: JokeBatchState, config: RunnableConfig):
+    configurable = configuration.Configuration.from_runnable_config(config)
+    subjects = state["subjects"]
+
+    # One structured call returns the whole micro-batch
+    jokes = []
+    if configurable.joke_mode == "list":
+        listed = "\n".join(f"{i + 1}. {s}" for i, s in enumerate(subjects))
+        prompt = jokes_prompt.format(n=len(subjects), subjects=listed)
+        jokes = model.with_structured_output(Jokes).invoke(prompt).jokes[:len(subjects)]
+
+    # model.batch covers "batch" mode, and any subjects the list call came back short on
+    missing = subjects[len(jokes):]
+    if missing:
+        prompts = [joke_prompt.format(subject=s) for s in missing]
+        responses = model.with_structured_output(Joke).batch(
+            prompts, config={"max_concurrency": int(configurable.joke_max_concurrency)}
+        )
+        jokes += [response.joke for response in responses]
+    return {"jokes": jokes}
+
+def pick_winners(topic: str, groups: list, max_concurrency: int) -> list:
+    # A group of one advances without a call
+    winners = [group[0] for group in groups]
+    contested = [i for i, group in enumerate(groups) if len(group) > 1]
+    if not contested:
+        return winners
+
+    # One small selection call per contested group, run in parallel
+    prompts = [best_joke_prompt.format(topic=topic, jokes="\n\n".join(groups[i])) for i in contested]
+    responses = model.with_structured_output(BestJoke).batch(prompts, config={"max_concurrency": max_concurrency})
+
+    # The model can return an id outside the group; fall back to the group's first joke
+    for i, r in zip(contested, responses):
+        if 0 <= r.id < len(groups[i]):
+            winners[i] = groups[i][r.id]
+    return winners
+
+def best_joke(state: OverallState, config: RunnableConfig):
+    configurable = configuration.Configuration.from_runnable_config(config)
+    size = max(int(configurable.selection_group_size), 2)
+
+    # Knockout bracket: group winners advance until a single joke is left
+    candidates = state["jokes"]
+    if not candidates:
+        # No jokes came back, so there is nothing to select
+        return {"best_selected_joke": ""}
+    while len(candidates) > 1:
+        groups = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+        candidates = pick_winners(state["topic"], groups, int(configurable.joke_max_concurrency))
+    return {"best_selected_joke": candidates[0]}
+
+JOKE_MODES = ("per_subject", "batch", "list")
+
+def joke_sends(subjects: list, configurable: configuration.Configuration):
+    if configurable.joke_mode not in JOKE_MODES:
+        raise ValueError(f"Unknown joke_mode {configurable.joke_mode!r}, expected one of {', '.join(JOKE_MODES)}")
+    if configurable.joke_mode == "per_subject":
+        for s in subjects:
+            yield Send("generate_joke", {"subject": s})
+        return
+
+    # Batched modes send one micro-batch of subjects per branch
+    size = int(configurable.joke_batch_size)
+    for i in range(0, len(subjects), size):
+        yield Send("generate_joke_batch", {"subjects": subjects[i:i + size]})
 
-def continue_to_jokes(state: OverallState):
-    return [Send("generate_joke", {"subject": s}) for s in state["subjects"]]
+def continue_to_jokes(state: OverallState, config: RunnableConfig):
+    # Each branch is its own task, checkpointed, retried and traced on its own;
+    # invoke with config={"max_concurrency": k} to keep at most k branches in flight
+    configurable = configuration.Configuration.from_runnable_config(config)
+    return list(joke_sends(state["subjects"], configurable))
 
 # Construct the graph: here we put everything together to construct our graph
-graph_builder = StateGraph(OverallState)
+graph_builder = StateGraph(OverallState, config_schema=configuration.Configuration)
 graph_builder.add_node("generate_topics", generate_topics)
 graph_builder.add_node("generate_joke", generate_joke)
+graph_builder.add_node("generate_joke_batch", generate_joke_batch)
 graph_builder.add_node("best_joke", best_joke)
 graph_builder.add_edge(START, "generate_topics")
-graph_builder.add_conditional_edges("generate_topics", continue_to_jokes, ["generate_joke"])
+graph_builder.add_conditional_edges("generate_topics", continue_to_jokes, ["generate_joke", "generate_joke_batch"])
 graph_builder.add_edge("generate_joke", "best_joke")
+graph_builder.add_edge("generate_joke_batch", "best_joke")
 graph_builder.add_edge("best_joke", END)
 
 # Compile the graph
@@ -4,6 +4,7 @@ from typing_extensions import TypedDict
 
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from langchain_community.document_loaders import WikipediaLoader
 from langchain_community.tools import TavilySearchResults
@@ -12,48 +13,108 @@ from langchain_openai import ChatOpenAI
 
 from langgraph.graph import StateGraph, START, END
 
+import configuration
+from async_retrieval import aload_wikipedia
+from chunked import ChunkedListChannel
+from deadlines import LatencyTracker, acall_with_deadline, call_with_deadline
+
 llm = ChatOpenAI(model="gpt-4o", temperature=0) 
 
+# Per-upstream latency history, used to decide when to hedge
+latencies = {"web": LatencyTracker(), "wikipedia": LatencyTracker()}
+
 class State(TypedDict):
     question: str
     answer: str
-    context: Annotated[list, operator.add]
+    context: Annotated[list, ChunkedListChannel]
+    dropped_sources: Annotated[list, operator.add] # Retrieval branches that missed their deadline
 
-def search_web(state):
-    
-    """ Retrieve docs from web search """
+def retrieval_budget(source: str, config: RunnableConfig):
 
-    # Search
-    tavily_search = TavilySearchResults(max_results=3)
-    search_docs = tavily_search.invoke(state['question'])
+    """ Deadline and hedge delay for a retrieval call, from config and recent latencies """
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    deadline = float(configurable.retrieval_deadline) if configurable.retrieval_deadline else None
+    hedge_after = None
+    if configurable.hedge_percentile:
+        hedge_after = latencies[source].percentile(float(configurable.hedge_percentile))
+    return {"deadline": deadline, "hedge_after": hedge_after, "tracker": latencies[source]}
+
+def format_web_docs(search_docs):
 
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
+    """ Format Tavily results as context """
+
+    return "\n\n---\n\n".join(
         [
             f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
             for doc in search_docs
         ]
     )
 
-    return {"context": [formatted_search_docs]} 
+def format_wikipedia_docs(search_docs):
 
-def search_wikipedia(state):
-    
-    """ Retrieve docs from wikipedia """
+    """ Format Wikipedia documents as context """
 
-    # Search
-    search_docs = WikipediaLoader(query=state['question'], 
-                                  load_max_docs=2).load()
-
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
+    return "\n\n---\n\n".join(
         [
             f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
             for doc in search_docs
         ]
     )
 
-    return {"context": [formatted_search_docs]} 
+def search_web(state, config: RunnableConfig):
+    
+    """ Retrieve docs from web search """
+
+    # Search
+    tavily_search = TavilySearchResults(max_results=3)
+    ok, search_docs = call_with_deadline(lambda: tavily_search.invoke(state['question']),
+                                         **retrieval_budget("web", config))
+    if not ok:
+        return {"context": [], "dropped_sources": ["web"]}
+
+    return {"context": [format_web_docs(search_docs)]} 
+
+async def asearch_web(state, config: RunnableConfig):
+    
+    """ Retrieve docs from web search without leaving the event loop """
+
+    # Search
+    tavily_search = TavilySearchResults(max_results=3)
+    ok, search_docs = await acall_with_deadline(lambda: tavily_search.ainvoke(state['question']),
+                                                **retrieval_budget("web", config))
+    if not ok:
+        return {"context": [], "dropped_sources": ["web"]}
+
+    return {"context": [format_web_docs(search_docs)]} 
+
+def search_wikipedia(state, config: RunnableConfig):
+    
+    """ Retrieve docs from wikipedia """
+
+    # Search
+    loader = WikipediaLoader(query=state['question'], 
+                             load_max_docs=2)
+    ok, search_docs = call_with_deadline(loader.load, **retrieval_budget("wikipedia", config))
+    if not ok:
+        return {"context": [], "dropped_sources": ["wikipedia"]}
+
+    return {"context": [format_wikipedia_docs(search_docs)]} 
+
+async def asearch_wikipedia(state, config: RunnableConfig):
+    
+    """ Retrieve docs from wikipedia without leaving the event loop """
+
+    # Search
+    ok, search_docs = await acall_with_deadline(lambda: aload_wikipedia(state['question'], load_max_docs=2),
+                                                **retrieval_budget("wikipedia", config))
+    if not ok:
+        return {"context": [], "dropped_sources": ["wikipedia"]}
+
+    return {"context": [format_wikipedia_docs(search_docs)]} 
+
+# Template
+answer_template = """Answer the question {question} using this context: {context}"""
 
 def generate_answer(state):
     
@@ -64,7 +125,6 @@ def generate_answer(state):
     question = state["question"]
 
     # Template
-    answer_template = """Answer the question {question} using this context: {context}"""
     answer_instructions = answer_template.format(question=question, 
                                                        context=context)    
     
@@ -74,18 +134,45 @@ def generate_answer(state):
     # Append it to state
     return {"answer": answer}
 
-# Add nodes
-builder = StateGraph(State)
-
-# Initialize each node with node_secret 
-builder.add_node("search_web",search_web)
-builder.add_node("search_wikipedia", search_wikipedia)
-builder.add_node("generate_answer", generate_answer)
-
-# Flow
-builder.add_edge(START, "search_wikipedia")
-builder.add_edge(START, "search_web")
-builder.add_edge("search_wikipedia", "generate_answer")
-builder.add_edge("search_web", "generate_answer")
-builder.add_edge("generate_answer", END)
-graph = builder.compile()
+async def agenerate_answer(state):
+    
+    """ Node to answer a question, awaiting the model """
+
+    # Get state
+    context = state["context"]
+    question = state["question"]
+
+    # Template
+    answer_instructions = answer_template.format(question=question, 
+                                                       context=context)    
+    
+    # Answer
+    answer = await llm.ainvoke([SystemMessage(content=answer_instructions)]+[HumanMessage(content=f"Answer the question.")])
+      
+    # Append it to state
+    return {"answer": answer}
+
+def build_graph(async_nodes: bool = True):
+
+    """ Build the graph; with async_nodes, ainvoke runs every node on the event loop instead of worker threads """
+
+    def node(func, afunc):
+        return RunnableLambda(func, afunc=afunc, name=func.__name__) if async_nodes else func
+
+    # Add nodes
+    builder = StateGraph(State, config_schema=configuration.Configuration)
+
+    # Initialize each node with node_secret 
+    builder.add_node("search_web", node(search_web, asearch_web))
+    builder.add_node("search_wikipedia", node(search_wikipedia, asearch_wikipedia))
+    builder.add_node("generate_answer", node(generate_answer, agenerate_answer))
+
+    # Flow
+    builder.add_edge(START, "search_wikipedia")
+    builder.add_edge(START, "search_web")
+    builder.add_edge("search_wikipedia", "generate_answer")
+    builder.add_edge("search_web", "generate_answer")
+    builder.add_edge("generate_answer", END)
+    return builder.compile()
+
+graph = build_graph()
@@ -0,0 +1,412 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from langgraph.channels.base import BaseChannel
+
+# "failure-analysis-on-log-7" -> stage "failure-analysis-on-log-", id "7"
+ENTRY_PATTERN = re.compile(r"(?P<stage>.+-on-log-)(?P<id>.+)")
+
+INT64_MAX = np.iinfo(np.int64).max
+
+# Integer ids per shard of an id set kept in a store, so a shard's bitmap stays within 8 KB
+SHARD_SIZE = 1 << 16
+
+def _is_plain_int(log_id: str) -> bool:
+    # Only ids that render back identically and fit an int64 can be packed as integers;
+    # str.isdigit() alone also accepts non-ASCII digits such as "²"
+    return (log_id.isascii() and log_id.isdigit() and (log_id == "0" or not log_id.startswith("0"))
+            and (len(log_id) < 19 or int(log_id) <= INT64_MAX))
+
+def shard_ids(ids: Iterable[str]) -> Dict[str, List[str]]:
+    """ Group ids by the key of their shard: integer ids by range of SHARD_SIZE, any other id on its own """
+    shards = {}
+    for log_id in ids:
+        log_id = str(log_id)
+        key = f"ints-{int(log_id) // SHARD_SIZE}" if _is_plain_int(log_id) else f"id-{log_id}"
+        shards.setdefault(key, []).append(log_id)
+    return shards
+
+class IdSet:
+    """Set of log ids for one stage, packed as integer ranges, a bitmap or a sorted array.
+
+    Integer ids are stored as sorted [start, end) ranges when they are mostly
+    contiguous, as a bitmap over [base, base + len) when they are dense but
+    fragmented, or as a plain sorted array when they are sparse, whichever
+    is smallest. Ids that are not plain integers are kept as a sorted tuple
+    of strings.
+    """
+
+    __slots__ = ("ranges", "base", "bits", "values", "extra", "_count")
+
+    def __init__(self, ranges=None, base: int = 0, bits=None, values=None, extra: Iterable[str] = ()):
+        self.bits = None if bits is None else np.asarray(bits, dtype=np.uint8)
+        self.values = None if values is None else np.asarray(values, dtype=np.int64)
+        self.ranges = None
+        if self.bits is None and self.values is None:
+            self.ranges = np.asarray(ranges if ranges is not None else (), dtype=np.int64).reshape(-1, 2)
+        self.base = int(base)
+        self.extra = tuple(extra)
+        self._count = None
+
+    @classmethod
+    def from_array(cls, ints: np.ndarray, extra: Iterable[str] = ()) -> "IdSet":
+        """ Pack sorted, unique integer ids into the smaller of the two encodings """
+
+        extra = tuple(sorted(set(extra)))
+        if not len(ints):
+            return cls(ranges=np.empty((0, 2), dtype=np.int64), extra=extra)
+
+        # Runs of consecutive ids become [start, end) ranges
+        breaks = np.flatnonzero(np.diff(ints) != 1) + 1
+        starts = ints[np.r_[0, breaks]]
+        ends = ints[np.r_[breaks - 1, len(ints) - 1]] + 1
+        span = int(ints[-1] - ints[0] + 1)
+        sizes = {"ranges": len(starts) * 16, "bits": (span + 7) // 8, "values": len(ints) * 8}
+        encoding = min(sizes, key=sizes.get)
+        if encoding == "ranges":
+            return cls(ranges=np.stack([starts, ends], axis=1), extra=extra)
+        if encoding == "values":
+            return cls(values=ints, extra=extra)
+
+        bits = np.zeros(span, dtype=bool)
+        bits[ints - ints[0]] = True
+        return cls(base=int(ints[0]), bits=np.packbits(bits), extra=extra)
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[str]) -> "IdSet":
+        ints, extra = [], []
+        for log_id in ids:
+            log_id = str(log_id)
+            (ints if _is_plain_int(log_id) else extra).append(log_id)
+        return cls.from_array(np.unique(np.array(ints, dtype=np.int64)), extra)
+
+    def to_array(self) -> np.ndarray:
+        """ Sorted integer ids """
+        if self.values is not None:
+            return self.values
+        if self.bits is not None:
+            return np.flatnonzero(np.unpackbits(self.bits)).astype(np.int64) + self.base
+        if not len(self.ranges):
+            return np.empty(0, dtype=np.int64)
+        starts, ends = self.ranges[:, 0], self.ranges[:, 1]
+        lengths = ends - starts
+        # Each id is its range start plus its position within the range
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + offsets
+
+    def union(self, other: "IdSet") -> "IdSet":
+        return IdSet.from_array(np.union1d(self.to_array(), other.to_array()), self.extra + other.extra)
+
+    def isin(self, ids: Iterable[str]) -> np.ndarray:
+        """ Vectorized membership: a boolean mask aligned with ids """
+        ids = [str(log_id) for log_id in ids]
+        plain = np.fromiter((_is_plain_int(log_id) for log_id in ids), dtype=bool, count=len(ids))
+        mask = np.zeros(len(ids), dtype=bool)
+        ints = np.array([int(log_id) for log_id, is_int in zip(ids, plain) if is_int], dtype=np.int64)
+        mask[plain] = self._contains_ints(ints)
+        if self.extra:
+            extra = set(self.extra)
+            mask[~plain] = [log_id in extra for log_id, is_int in zip(ids, plain) if not is_int]
+        return mask
+
+    def _contains_ints(self, ints: np.ndarray) -> np.ndarray:
+        # Answered from the packed encoding, so the cost depends on len(ints), not on the set's size
+        if self.values is not None:
+            index = np.minimum(np.searchsorted(self.values, ints), max(len(self.values) - 1, 0))
+            return (self.values[index] == ints) if len(self.values) else np.zeros(len(ints), dtype=bool)
+        if self.bits is not None:
+            offsets = ints - self.base
+            inside = (offsets >= 0) & (offsets < len(self.bits) * 8)
+            found = np.zeros(len(ints), dtype=bool)
+            offsets = offsets[inside]
+            found[inside] = (self.bits[offsets >> 3] & (0x80 >> (offsets & 7))) != 0
+            return found
+        index = np.searchsorted(self.ranges[:, 0], ints, side="right") - 1
+        found = index >= 0
+        found[found] = ints[found] < self.ranges[index[found], 1]
+        return found
+
+    def __contains__(self, log_id) -> bool:
+        log_id = str(log_id)
+        if not _is_plain_int(log_id):
+            return log_id in self.extra
+        value = int(log_id)
+        if self.values is not None:
+            index = np.searchsorted(self.values, value)
+            return index < len(self.values) and self.values[index] == value
+        if self.bits is not None:
+            offset = value - self.base
+            return 0 <= offset < len(self.bits) * 8 and bool(self.bits[offset >> 3] & (0x80 >> (offset & 7)))
+        index = np.searchsorted(self.ranges[:, 0], value, side="right") - 1
+        return index >= 0 and value < self.ranges[index, 1]
+
+    def __len__(self):
+        if self._count is None:
+            if self.values is not None:
+                packed = len(self.values)
+            elif self.bits is not None:
+                packed = int(np.unpackbits(self.bits).sum())
+            else:
+                packed = int((self.ranges[:, 1] - self.ranges[:, 0]).sum())
+            self._count = packed + len(self.extra)
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self.to_array():
+            yield str(value)
+        yield from self.extra
+
+    def nbytes(self) -> int:
+        packed = next(array.nbytes for array in (self.values, self.bits, self.ranges) if array is not None)
+        return packed + sum(len(log_id) for log_id in self.extra)
+
+    def to_json(self) -> dict:
+        """ Same as to_dict() with plain lists, for stores that only take JSON values """
+        return {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in self.to_dict().items()}
+
+    def to_dict(self) -> dict:
+        if self.values is not None:
+            return {"values": self.values, "extra": list(self.extra)}
+        if self.bits is not None:
+            return {"base": self.base, "bits": self.bits, "extra": list(self.extra)}
+        return {"ranges": self.ranges, "extra": list(self.extra)}
+
+class IdRuns:
+    """Sequence of log ids in their original order, duplicates included.
+
+    Each maximal stretch of strictly ascending integer ids is packed as one
+    IdSet, from which the stretch is recovered in sorted order, so ids that
+    arrive in order cost one IdSet in total. Ids that are not plain
+    integers are kept as strings in between.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Iterable = ()):
+        self.parts = [part if isinstance(part, (str, IdSet)) else IdSet(**part) for part in parts]
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[str]) -> "IdRuns":
+        parts, ints = [], []
+
+        def flush():
+            if ints:
+                values = np.array(ints, dtype=np.int64)
+                breaks = np.flatnonzero(np.diff(values) <= 0) + 1
+                parts.extend(IdSet.from_array(stretch) for stretch in np.split(values, breaks))
+                ints.clear()
+
+        for log_id in ids:
+            log_id = str(log_id)
+            if _is_plain_int(log_id):
+                ints.append(int(log_id))
+            else:
+                flush()
+                parts.append(log_id)
+        flush()
+        return cls(parts)
+
+    def concat(self, other: "IdRuns") -> "IdRuns":
+        return IdRuns(self.parts + other.parts)
+
+    def ints(self) -> np.ndarray:
+        """ The integer ids, in order """
+        arrays = [part.to_array() for part in self.parts if isinstance(part, IdSet)]
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    @property
+    def strings(self) -> list:
+        return [part for part in self.parts if isinstance(part, str)]
+
+    def __len__(self):
+        return sum(1 if isinstance(part, str) else len(part) for part in self.parts)
+
+    def __iter__(self) -> Iterator[str]:
+        for part in self.parts:
+            if isinstance(part, str):
+                yield part
+            else:
+                yield from part
+
+    def nbytes(self) -> int:
+        return sum(len(part) if isinstance(part, str) else part.nbytes() for part in self.parts)
+
+    def to_dict(self) -> dict:
+        return {"parts": [part if isinstance(part, str) else part.to_dict() for part in self.parts]}
+
+    def to_json(self) -> dict:
+        return {"parts": [part if isinstance(part, str) else part.to_json() for part in self.parts]}
+
+class ProcessedLogs:
+    """Compact, immutable record of which logs each stage processed.
+
+    Replaces one "<stage><id>" string per processed log with segments of
+    (stage, IdRuns), in the order the entries were added. Iterating renders
+    exactly the list of strings it replaces, order and duplicates included,
+    and union() concatenates like the list reducer did. Membership checks
+    use one packed IdSet per stage, built on first use.
+    """
+
+    __slots__ = ("segments", "_stages")
+
+    def __init__(self, segments: Optional[Iterable] = None):
+        self.segments = [(stage, ids if isinstance(ids, IdRuns) else IdRuns(**ids)) for stage, ids in segments or ()]
+        self._stages = None
+
+    @classmethod
+    def from_ids(cls, stage: str, ids: Iterable[str]) -> "ProcessedLogs":
+        """ Mark ids as processed by stage, e.g. from_ids("summary-on-log-", logs.ids) """
+        return cls([(stage, IdRuns.from_ids(ids))])
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[str]) -> "ProcessedLogs":
+        """ Parse rendered "<stage><id>" strings, e.g. an older processed_logs list """
+        segments = []
+        for entry in entries:
+            match = ENTRY_PATTERN.fullmatch(entry)
+            if match is None:
+                raise ValueError(f"Not a processed log entry: {entry!r}")
+            if segments and segments[-1][0] == match["stage"]:
+                segments[-1][1].append(match["id"])
+            else:
+                segments.append((match["stage"], [match["id"]]))
+        return cls([(stage, IdRuns.from_ids(ids)) for stage, ids in segments])
+
+    def union(self, other: "ProcessedLogs") -> "ProcessedLogs":
+        segments = list(self.segments)
+        for stage, ids in other.segments:
+            # Adjacent segments of one stage share their runs
+            if segments and segments[-1][0] == stage:
+                segments[-1] = (stage, segments[-1][1].concat(ids))
+            else:
+                segments.append((stage, ids))
+        return ProcessedLogs(segments)
+
+    @property
+    def stages(self) -> Dict[str, IdSet]:
+        """ Packed set of processed ids per stage """
+        if self._stages is None:
+            by_stage = {}
+            for stage, ids in self.segments:
+                by_stage.setdefault(stage, []).append(ids)
+            self._stages = {
+                stage: IdSet.from_array(np.unique(np.concatenate([ids.ints() for ids in runs])),
+                                        [log_id for ids in runs for log_id in ids.strings])
+                for stage, runs in by_stage.items()
+            }
+        return self._stages
+
+    def contains(self, stage: str, log_id) -> bool:
+        return stage in self.stages and log_id in self.stages[stage]
+
+    def __contains__(self, entry: str) -> bool:
+        match = ENTRY_PATTERN.fullmatch(entry)
+        return match is not None and self.contains(match["stage"], match["id"])
+
+    def count(self, stage: Optional[str] = None) -> int:
+        """ Rendered entries, for one stage or in total """
+        return sum(len(ids) for s, ids in self.segments if stage is None or s == stage)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self) -> Iterator[str]:
+        for stage, ids in self.segments:
+            for log_id in ids:
+                yield f"{stage}{log_id}"
+
+    def __eq__(self, other):
+        if isinstance(other, (ProcessedLogs, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        # Renders like the list of strings it replaces
+        return repr(list(self))
+
+    def nbytes(self) -> int:
+        """ Approximate packed size, excluding Python object overhead """
+        return sum(len(stage) + ids.nbytes() for stage, ids in self.segments)
+
+    def __reduce__(self):
+        return (ProcessedLogs, (self.to_dict()["segments"],))
+
+    def to_dict(self) -> dict:
+        return {"segments": [(stage, ids.to_dict()) for stage, ids in self.segments]}
+
+    def to_json(self) -> dict:
+        """ Same as to_dict() with plain lists, for checkpoints and stores that only take JSON values """
+        return {"segments": [[stage, ids.to_json()] for stage, ids in self.segments]}
+
+def union_processed(left: Optional[object], right: Optional[object]) -> ProcessedLogs:
+    """ Union of two ProcessedLogs, either of which may also be a list of rendered entries """
+
+    def coerce(value) -> ProcessedLogs:
+        if value is None:
+            return ProcessedLogs()
+        if isinstance(value, ProcessedLogs):
+            return value
+        return ProcessedLogs.from_entries(value)
+
+    return coerce(left).union(coerce(right))
+
+class ProcessedLogsChannel(BaseChannel[list, list, dict]):
+    """Channel for Annotated[List[str], ProcessedLogsChannel], appending like operator.add.
+
+    Updates are lists of "<stage><id>" entries (or ProcessedLogs). They are
+    kept, and checkpointed, as one packed ProcessedLogs; reading the channel
+    returns the plain list of entries, rendered once per change. The graph's
+    schemas and output therefore see List[str].
+    """
+
+    __slots__ = ("logs", "rendered")
+
+    def __init__(self, typ=list, key: str = ""):
+        super().__init__(typ, key)
+        self.logs = ProcessedLogs()
+        self.rendered = []
+
+    @property
+    def ValueType(self):
+        return self.typ
+
+    @property
+    def UpdateType(self):
+        return self.typ
+
+    def __eq__(self, other):
+        return isinstance(other, ProcessedLogsChannel)
+
+    def copy(self) -> "ProcessedLogsChannel":
+        channel = self.__class__(self.typ, self.key)
+        channel.logs, channel.rendered = self.logs, self.rendered
+        return channel
+
+    def from_checkpoint(self, checkpoint) -> "ProcessedLogsChannel":
+        channel = self.__class__(self.typ, self.key)
+        if isinstance(checkpoint, dict):
+            channel.logs, channel.rendered = ProcessedLogs(checkpoint["segments"]), None
+        return channel
+
+    def update(self, values) -> bool:
+        values = [value for value in values if value]
+        if not values:
+            return False
+        for value in values:
+            self.logs = union_processed(self.logs, value)
+        self.rendered = None
+        return True
+
+    def get(self) -> list:
+        if self.rendered is None:
+            self.rendered = list(self.logs)
+        return self.rendered
+
+    def is_available(self) -> bool:
+        return True
+
+    def checkpoint(self) -> dict:
+        return self.logs.to_json()
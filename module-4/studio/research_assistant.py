@@ -1,4 +1,6 @@
 import operator
+import threading
+import time
 from pydantic import BaseModel, Field
 from typing import Annotated, List
 from typing_extensions import TypedDict
@@ -6,15 +8,26 @@ from typing_extensions import TypedDict
 from langchain_community.document_loaders import WikipediaLoader
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_openai import ChatOpenAI
 
 from langgraph.constants import Send
 from langgraph.graph import END, MessagesState, START, StateGraph
 
+import configuration
+from async_retrieval import aload_wikipedia
+from chunked import ChunkedListChannel
+from citations import CitationRegistry, format_sources, renumber_sections, split_sources
+from singleflight import SingleFlight, normalize_query, prompt_key
+from windowed import windowed_map
+
 ### LLM
 
 llm = ChatOpenAI(model="gpt-4o", temperature=0) 
 
+# Coalesce identical in-flight search and LLM requests across parallel interviews
+inflight = SingleFlight()
+
 ### Schema 
 
 class Analyst(BaseModel):
@@ -47,7 +60,8 @@ class GenerateAnalystsState(TypedDict):
 
 class InterviewState(MessagesState):
     max_num_turns: int # Number turns of conversation
-    context: Annotated[list, operator.add] # Source docs
+    context: Annotated[list, ChunkedListChannel] # Source docs
+    source_records: Annotated[list, operator.add] # Source records, {"source": ..., "page": ...}
     analyst: Analyst # Analyst asking questions
     interview: str # Interview transcript
     sections: list # Final key we duplicate in outer state for Send() API
@@ -60,7 +74,9 @@ class ResearchGraphState(TypedDict):
     max_analysts: int # Number of analysts
     human_analyst_feedback: str # Human feedback
     analysts: List[Analyst] # Analyst asking questions
-    sections: Annotated[list, operator.add] # Send() API key
+    sections: Annotated[list, ChunkedListChannel] # Send() API key
+    draft: str # Running report draft, folded as sections arrive in incremental mode
+    sources: list # Report-wide source list, numbered as cited in content
     introduction: str # Introduction for the final report
     content: str # Content for the final report
     conclusion: str # Conclusion for the final report
@@ -102,8 +118,8 @@ def create_analysts(state: GenerateAnalystsState):
     # Generate question 
     analysts = structured_llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content="Generate the set of analysts.")])
     
-    # Write the list of analysis to state
-    return {"analysts": analysts.analysts}
+    # Write the list of analysis to state, clearing any draft left on the thread by an earlier run
+    return {"analysts": analysts.analysts, "draft": "", "sources": []}
 
 def human_feedback(state: GenerateAnalystsState):
     """ No-op node that should be interrupted on """
@@ -154,6 +170,53 @@ Pay particular attention to the final question posed by the analyst.
 
 Convert this final question into a well-structured web search query""")
 
+def generate_search_query(messages: list) -> SearchQuery:
+
+    """ Write a search query, sharing the call with any identical request in flight """
+
+    # search_web and search_wikipedia run in parallel on the same messages
+    prompt = [search_instructions]+messages
+    key = prompt_key(prompt, model=llm.model_name, temperature=llm.temperature, schema="SearchQuery")
+    structured_llm = llm.with_structured_output(SearchQuery)
+    return inflight.do(key, structured_llm.invoke, prompt)
+
+async def agenerate_search_query(messages: list) -> SearchQuery:
+
+    """ Async variant of generate_search_query """
+
+    prompt = [search_instructions]+messages
+    key = prompt_key(prompt, model=llm.model_name, temperature=llm.temperature, schema="SearchQuery")
+    structured_llm = llm.with_structured_output(SearchQuery)
+    return await inflight.ado(key, structured_llm.ainvoke, prompt)
+
+def format_web_docs(search_docs):
+
+    """ Format Tavily results as context plus their source records """
+
+    formatted_search_docs = "\n\n---\n\n".join(
+        [
+            f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
+            for doc in search_docs
+        ]
+    )
+
+    return {"context": [formatted_search_docs],
+            "source_records": [{"source": doc["url"]} for doc in search_docs]} 
+
+def format_wikipedia_docs(search_docs):
+
+    """ Format Wikipedia documents as context plus their source records """
+
+    formatted_search_docs = "\n\n---\n\n".join(
+        [
+            f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
+            for doc in search_docs
+        ]
+    )
+
+    return {"context": [formatted_search_docs],
+            "source_records": [{"source": doc.metadata["source"], "page": doc.metadata.get("page", "")} for doc in search_docs]} 
+
 def search_web(state: InterviewState):
     
     """ Retrieve docs from web search """
@@ -162,43 +225,57 @@ def search_web(state: InterviewState):
     tavily_search = TavilySearchResults(max_results=3)
 
     # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions]+state['messages'])
+    search_query = generate_search_query(state['messages'])
     
     # Search
-    search_docs = tavily_search.invoke(search_query.search_query)
+    query = search_query.search_query
+    search_docs = inflight.do(("tavily", normalize_query(query)), tavily_search.invoke, query)
 
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    return format_web_docs(search_docs)
 
-    return {"context": [formatted_search_docs]} 
+async def asearch_web(state: InterviewState):
+    
+    """ Retrieve docs from web search without leaving the event loop """
+
+    # Search
+    tavily_search = TavilySearchResults(max_results=3)
+
+    # Search query
+    search_query = await agenerate_search_query(state['messages'])
+    
+    # Search
+    query = search_query.search_query
+    search_docs = await inflight.ado(("tavily", normalize_query(query)), tavily_search.ainvoke, query)
+
+    return format_web_docs(search_docs)
 
 def search_wikipedia(state: InterviewState):
     
     """ Retrieve docs from wikipedia """
 
     # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions]+state['messages'])
+    search_query = generate_search_query(state['messages'])
     
     # Search
-    search_docs = WikipediaLoader(query=search_query.search_query, 
-                                  load_max_docs=2).load()
+    query = search_query.search_query
+    search_docs = inflight.do(("wikipedia", normalize_query(query)),
+                              WikipediaLoader(query=query, load_max_docs=2).load)
 
-     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    return format_wikipedia_docs(search_docs)
 
-    return {"context": [formatted_search_docs]} 
+async def asearch_wikipedia(state: InterviewState):
+    
+    """ Retrieve docs from wikipedia without leaving the event loop """
+
+    # Search query
+    search_query = await agenerate_search_query(state['messages'])
+    
+    # Search
+    query = search_query.search_query
+    search_docs = await inflight.ado(("wikipedia", normalize_query(query)),
+                                     aload_wikipedia, query, load_max_docs=2)
+
+    return format_wikipedia_docs(search_docs)
 
 # Generate expert answer
 answer_instructions = """You are an expert being interviewed by an analyst.
@@ -248,6 +325,25 @@ def generate_answer(state: InterviewState):
     # Append it to state
     return {"messages": [answer]}
 
+async def agenerate_answer(state: InterviewState):
+    
+    """ Node to answer a question, awaiting the model """
+
+    # Get state
+    analyst = state["analyst"]
+    messages = state["messages"]
+    context = state["context"]
+
+    # Answer question
+    system_message = answer_instructions.format(goals=analyst.persona, context=context)
+    answer = await llm.ainvoke([SystemMessage(content=system_message)]+messages)
+            
+    # Name the message as coming from the expert
+    answer.name = "expert"
+    
+    # Append it to state
+    return {"messages": [answer]}
+
 def save_interview(state: InterviewState):
     
     """ Save interviews """
@@ -302,7 +398,6 @@ Your task is to create a short, easily digestible section of a report based on a
 3. Write the report following this structure:
 a. Title (## header)
 b. Summary (### header)
-c. Sources (### header)
 
 4. Make your title engaging based upon the focus area of the analyst: 
 {focus}
@@ -310,31 +405,12 @@ c. Sources (### header)
 5. For the summary section:
 - Set up summary with general background / context related to the focus area of the analyst
 - Emphasize what is novel, interesting, or surprising about insights gathered from the interview
-- Create a numbered list of source documents, as you use them
 - Do not mention the names of interviewers or experts
 - Aim for approximately 400 words maximum
-- Use numbered sources in your report (e.g., [1], [2]) based on information from source documents
+- Cite sources with the numbers from the numbered source list you are given (e.g., [1], [2])
+- Do not write a Sources section, it is added for you from the numbered source list
         
-6. In the Sources section:
-- Include all sources used in your report
-- Provide full links to relevant websites or specific document paths
-- Separate each source by a newline. Use two spaces at the end of each line to create a newline in Markdown.
-- It will look like:
-
-### Sources
-[1] Link or Document name
-[2] Link or Document name
-
-7. Be sure to combine sources. For example this is not correct:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-[4] https://ai.meta.com/blog/meta-llama-3-1/
-
-There should be no redundant sources. It should simply be:
-
-[3] https://ai.meta.com/blog/meta-llama-3-1/
-        
-8. Final review:
+6. Final review:
 - Ensure the report follows the required structure
 - Include no preamble before the title of the report
 - Check that all guidelines have been followed"""
@@ -348,19 +424,30 @@ def write_section(state: InterviewState):
     context = state["context"]
     analyst = state["analyst"]
    
+    # Number the deduplicated sources so the writer can cite them
+    registry = CitationRegistry()
+    registry.add_records(state.get("source_records", []))
+
     # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
     system_message = section_writer_instructions.format(focus=analyst.description)
-    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]) 
+    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}\n\nCite these sources by number:\n{registry.render()}")]) 
+
+    # Keep only the sources the section cites and render them in code
+    body, _ = split_sources(section.content)
+    body, cited = registry.cited(body)
+    if len(cited):
+        body += "\n\n### Sources\n" + cited.render()
                 
     # Append it to state
-    return {"sections": [section.content]}
+    return {"sections": [body]}
 
 # Add nodes and edges 
 interview_builder = StateGraph(InterviewState)
 interview_builder.add_node("ask_question", generate_question)
-interview_builder.add_node("search_web", search_web)
-interview_builder.add_node("search_wikipedia", search_wikipedia)
-interview_builder.add_node("answer_question", generate_answer)
+# Retrieval and answer nodes run on the event loop under ainvoke and as plain functions under invoke
+interview_builder.add_node("search_web", RunnableLambda(search_web, afunc=asearch_web, name="search_web"))
+interview_builder.add_node("search_wikipedia", RunnableLambda(search_wikipedia, afunc=asearch_wikipedia, name="search_wikipedia"))
+interview_builder.add_node("answer_question", RunnableLambda(generate_answer, afunc=agenerate_answer, name="answer_question"))
 interview_builder.add_node("save_interview", save_interview)
 interview_builder.add_node("write_section", write_section)
 
@@ -374,7 +461,19 @@ interview_builder.add_conditional_edges("answer_question", route_messages,['ask_
 interview_builder.add_edge("save_interview", "write_section")
 interview_builder.add_edge("write_section", END)
 
-def initiate_all_interviews(state: ResearchGraphState):
+interview_graph = interview_builder.compile()
+
+def interview_input(analyst: Analyst, topic: str) -> dict:
+
+    """ Initial interview state for one analyst """
+
+    return {"analyst": analyst,
+            "messages": [HumanMessage(
+                content=f"So you said you were writing an article on {topic}?"
+            )
+                        ]}
+
+def initiate_all_interviews(state: ResearchGraphState, config: RunnableConfig):
 
     """ Conditional edge to initiate all interviews via Send() API or return to create_analysts """    
 
@@ -384,14 +483,15 @@ def initiate_all_interviews(state: ResearchGraphState):
         # Return to create_analysts
         return "create_analysts"
 
+    # Fold sections into the report as each interview finishes, or cap the interviews in flight
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if configurable.report_mode == "incremental" or configurable.fanout_window:
+        return "conduct_interviews_incremental"
+
     # Otherwise kick off interviews in parallel via Send() API
     else:
         topic = state["topic"]
-        return [Send("conduct_interview", {"analyst": analyst,
-                                           "messages": [HumanMessage(
-                                               content=f"So you said you were writing an article on {topic}?"
-                                           )
-                                                       ]}) for analyst in state["analysts"]]
+        return [Send("conduct_interview", interview_input(analyst, topic)) for analyst in state["analysts"]]
 
 # Write a report based on the interviews
 report_writer_instructions = """You are a technical writer creating a report on this overall topic: 
@@ -417,18 +517,183 @@ To format your report:
 3. Use no sub-heading. 
 4. Start your report with a single title header: ## Insights
 5. Do not mention any analyst names in your report.
-6. Preserve any citations in the memos, which will be annotated in brackets, for example [1] or [2].
-7. Create a final, consolidated list of sources and add to a Sources section with the `## Sources` header.
-8. List your sources in order and do not repeat.
-
-[1] Source 1
-[2] Source 2
+6. Preserve any citations in the memos exactly as written, which will be annotated in brackets, for example [1] or [2].
+7. Do not add a sources section, it is added for you.
 
 Here are the memos from your analysts to build your report from: 
 
 {context}"""
 
-def write_report(state: ResearchGraphState):
+# Fold batches of memos into a running draft
+report_fold_instructions = """You are a technical writer building a report on this overall topic: 
+
+{topic}
+
+Memos from your analysts arrive in batches. Here is the report draft so far (it is empty for the first batch):
+
+<draft>
+{draft}
+</draft>
+
+Your task: fold the new memos below into the draft.
+
+1. Weave the central points of the memos into the existing narrative instead of appending them.
+2. Keep the draft crisp: merge overlapping ideas rather than repeating them.
+3. Start the draft with a single title header: ## Insights
+4. Use no sub-heading and do not mention any analyst names.
+5. Preserve any citations in the memos and the draft exactly as written, which will be annotated in brackets, for example [1] or [2].
+6. Do not add a sources section, it is added for you.
+
+Here are the new memos: 
+
+{sections}"""
+
+def fold_sections(topic: str, draft: str, sections: list) -> str:
+
+    """ Fold a batch of sections into the running draft """
+
+    system_message = report_fold_instructions.format(topic=topic, draft=draft, sections="\n\n".join(sections))
+    report = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Update the draft with these memos.")])
+    return report.content
+
+def conduct_interviews_incremental(state: ResearchGraphState, config: RunnableConfig):
+
+    """ Run interviews in a bounded window and, in incremental mode, fold each section into the draft as it arrives """
+
+    topic = state["topic"]
+    analysts = state["analysts"]
+    configurable = configuration.Configuration.from_runnable_config(config)
+    incremental = configurable.report_mode == "incremental"
+    window = int(configurable.fanout_window or max(len(analysts), 1))
+
+    # Optional straggler cutoff: after the deadline, finalize once min_sections have arrived
+    deadline = None
+    if configurable.straggler_deadline:
+        deadline = time.monotonic() + float(configurable.straggler_deadline)
+    min_sections = min(int(configurable.min_sections or 1), len(analysts))
+
+    sections = []
+    draft = ""
+    pending = []
+    folded = 0
+    registry = CitationRegistry()
+
+    def next_timeout():
+        # Wait for the next interview, or until the deadline if we already have enough sections
+        if deadline is not None and len(sections) >= min_sections:
+            return max(deadline - time.monotonic(), 0)
+        return None
+
+    # Pass callbacks through so tracing and token accounting see the interviews
+    callbacks = {"callbacks": config.get("callbacks")}
+    stopped = threading.Event()
+    def run_interview(analyst):
+        # Step through the interview so a dropped straggler stops after its current step,
+        # instead of making LLM and search calls for a report that is already finalized
+        interview = {}
+        for interview in interview_graph.stream(interview_input(analyst, topic), callbacks, stream_mode="values"):
+            if stopped.is_set():
+                break
+        return interview
+
+    # Stragglers past the deadline are dropped rather than block the report
+    try:
+        for interview in windowed_map(run_interview, analysts, window, timeout=next_timeout):
+            for section in interview["sections"]:
+                if incremental:
+                    pending.append(registry.add_section(section))
+                sections.append(section)
+
+            # Fold finished sections while the other interviews keep running. Each fold re-sends the
+            # draft, so wait until the pending memos at least match those already folded: the batches
+            # double, the draft is re-sent O(log n) times, and fold tokens grow linearly, not quadratically
+            if incremental and pending and len(pending) >= folded:
+                draft = fold_sections(topic, draft, pending)
+                folded += len(pending)
+                pending = []
+    finally:
+        # Interviews still running stop at their next step
+        stopped.set()
+
+    if not incremental:
+        return {"sections": sections}
+    if pending:
+        draft = fold_sections(topic, draft, pending)
+    return {"sections": sections, "draft": draft, "sources": registry.sources()}
+
+# Polish the folded draft
+report_polish_instructions = """You are a technical writer finishing a report on this overall topic: 
+
+{topic}
+
+The draft below was built up from batches of analyst memos. Polish it into a cohesive single narrative:
+
+1. Smooth the transitions and remove any repetition left over from folding memos in batch by batch.
+2. Do not add new information.
+3. Keep the single title header: ## Insights
+4. Use no sub-heading and do not mention any analyst names.
+5. Preserve every citation exactly as written, for example [1] or [2].
+
+Here is the draft: 
+
+{draft}"""
+
+# Reduce a batch of memos into one memo for the tree reduce
+report_reduce_instructions = """You are a technical writer helping to create a report on this overall topic: 
+
+{topic}
+
+You will be given a batch of memos. Consolidate them into a single memo that will later be merged with other memos.
+
+1. Keep the central, specific insights from every memo and merge overlapping ideas.
+2. Do not mention any analyst names.
+3. Use no headers.
+4. Preserve every citation exactly as written, for example [7] or [12]. Do not renumber citations.
+5. Do not add a sources section.
+
+Here are the memos: 
+
+{context}"""
+
+def estimate_tokens(text: str) -> int:
+
+    """ Cheap token estimate, roughly four characters per token """
+
+    return len(text) // 4
+
+def batch_by_budget(texts: List[str], budget: int) -> List[List[str]]:
+
+    """ Group texts in order into batches under the token budget, at least two per batch """
+
+    batches = []
+    batch, size = [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        # Every batch takes at least two texts so each level of the tree shrinks
+        if len(batch) >= 2 and size + tokens > budget:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(text)
+        size += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def tree_reduce(topic: str, texts: List[str], budget: int, concurrency: int) -> List[str]:
+
+    """ Summarize batches of texts in parallel, level by level, until they fit the budget """
+
+    while len(texts) > 1 and estimate_tokens("\n\n".join(texts)) > budget:
+        batches = batch_by_budget(texts, budget)
+        prompts = [
+            [SystemMessage(content=report_reduce_instructions.format(topic=topic, context="\n\n".join(batch)))]
+            + [HumanMessage(content=f"Consolidate these memos.")]
+            for batch in batches
+        ]
+        texts = [reduced.content for reduced in llm.batch(prompts, config={"max_concurrency": concurrency})]
+    return texts
+
+def write_report(state: ResearchGraphState, config: RunnableConfig):
 
     """ Node to write the final report body """
 
@@ -436,13 +701,29 @@ def write_report(state: ResearchGraphState):
     sections = state["sections"]
     topic = state["topic"]
 
+    # In incremental mode the body is already drafted, so only polish it
+    if state.get("draft"):
+        system_message = report_polish_instructions.format(topic=topic, draft=state["draft"])
+        report = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Polish this report.")])
+        return {"content": report.content}
+
+    # Consolidate sources in code so the memos share one report-wide numbering
+    bodies, sources = renumber_sections(sections)
+
+    # Too many sections for one call: tree-reduce them first
+    configurable = configuration.Configuration.from_runnable_config(config)
+    budget = int(configurable.report_token_budget)
+    if len(bodies) > 1 and estimate_tokens("\n\n".join(bodies)) > budget:
+        bodies = tree_reduce(topic, bodies, budget, int(configurable.reduce_concurrency))
+
     # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
+    formatted_str_sections = "\n\n".join([f"{body}" for body in bodies])
     
     # Summarize the sections into a final report
     system_message = report_writer_instructions.format(topic=topic, context=formatted_str_sections)    
     report = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Write a report based upon these memos.")]) 
-    return {"content": report.content}
+    content, _ = split_sources(report.content)
+    return {"content": content, "sources": sources}
 
 # Write the introduction or conclusion
 intro_conclusion_instructions = """You are a technical writer finishing a report on {topic}
@@ -475,8 +756,8 @@ def write_introduction(state: ResearchGraphState):
     sections = state["sections"]
     topic = state["topic"]
 
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
+    # Concat all sections together, or reuse the folded draft in incremental mode
+    formatted_str_sections = state.get("draft") or "\n\n".join([f"{section}" for section in sections])
     
     # Summarize the sections into a final report
     
@@ -492,8 +773,8 @@ def write_conclusion(state: ResearchGraphState):
     sections = state["sections"]
     topic = state["topic"]
 
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
+    # Concat all sections together, or reuse the folded draft in incremental mode
+    formatted_str_sections = state.get("draft") or "\n\n".join([f"{section}" for section in sections])
     
     # Summarize the sections into a final report
     
@@ -506,27 +787,22 @@ def finalize_report(state: ResearchGraphState):
     """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the intro/conclusion """
 
     # Save full final report
-    content = state["content"]
-    if content.startswith("## Insights"):
-        content = content.strip("## Insights")
-    if "## Sources" in content:
-        try:
-            content, sources = content.split("\n## Sources\n")
-        except:
-            sources = None
-    else:
-        sources = None
+    content, _ = split_sources(state["content"])
+    content = content.removeprefix("## Insights").strip()
 
+    # Sources are tracked as records, so the list is rendered rather than parsed out of the body
     final_report = state["introduction"] + "\n\n---\n\n" + content + "\n\n---\n\n" + state["conclusion"]
-    if sources is not None:
-        final_report += "\n\n## Sources\n" + sources
+    sources = state.get("sources")
+    if sources:
+        final_report += "\n\n## Sources\n" + format_sources(sources)
     return {"final_report": final_report}
 
 # Add nodes and edges 
-builder = StateGraph(ResearchGraphState)
+builder = StateGraph(ResearchGraphState, config_schema=configuration.Configuration)
 builder.add_node("create_analysts", create_analysts)
 builder.add_node("human_feedback", human_feedback)
-builder.add_node("conduct_interview", interview_builder.compile())
+builder.add_node("conduct_interview", interview_graph)
+builder.add_node("conduct_interviews_incremental", conduct_interviews_incremental)
 builder.add_node("write_report",write_report)
 builder.add_node("write_introduction",write_introduction)
 builder.add_node("write_conclusion",write_conclusion)
@@ -535,10 +811,13 @@ builder.add_node("finalize_report",finalize_report)
 # Logic
 builder.add_edge(START, "create_analysts")
 builder.add_edge("create_analysts", "human_feedback")
-builder.add_conditional_edges("human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview"])
+builder.add_conditional_edges("human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview", "conduct_interviews_incremental"])
 builder.add_edge("conduct_interview", "write_report")
 builder.add_edge("conduct_interview", "write_introduction")
 builder.add_edge("conduct_interview", "write_conclusion")
+builder.add_edge("conduct_interviews_incremental", "write_report")
+builder.add_edge("conduct_interviews_incremental", "write_introduction")
+builder.add_edge("conduct_interviews_incremental", "write_conclusion")
 builder.add_edge(["write_conclusion", "write_report", "write_introduction"], "finalize_report")
 builder.add_edge("finalize_report", END)
 
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+research_batch.py
+
+Run the research assistant graph over a batch of topics without Studio.
+
+Each line of the input JSONL file is one job:
+
+  {"topic": "...", "max_analysts": 3}
+  {"topic": "...", "max_analysts": 5, "feedback": ["Add an analyst from a startup"]}
+  {"id": "weekly-llmops", "topic": "...", "config": {"report_mode": "incremental"}}
+
+Analysts are auto-approved after any pre-supplied feedback rounds have been
+applied. Every topic is checkpointed to a local SQLite database under its
+own thread, so re-running the same batch after a crash resumes unfinished
+topics and skips finished ones, without rewriting their reports or stats.
+
+Usage:
+  python3 research_batch.py topics.jsonl --out-dir reports --max-parallel 4
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from research_assistant import builder
+
+
+def load_jobs(path: Path) -> list[dict]:
+    jobs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line)
+            job.setdefault("max_analysts", 3)
+            job.setdefault("id", job_id(job))
+            jobs.append(job)
+    return jobs
+
+
+def job_id(job: dict) -> str:
+    """Stable id for a job, so a re-run maps it onto the same checkpoint thread."""
+    slug = re.sub(r"[^a-z0-9]+", "-", job["topic"].lower()).strip("-")[:40]
+    digest = hashlib.sha1(f"{job['topic']}|{job['max_analysts']}".encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}"
+
+
+def applied_rounds(graph, config: dict) -> int:
+    """Feedback rounds already applied to a topic's thread, from the newest round number in its checkpoints."""
+    for snapshot in graph.get_state_history(config):
+        if "feedback_round" in snapshot.metadata:
+            return snapshot.metadata["feedback_round"] + 1
+    return 0
+
+
+def run_topic(graph, job: dict) -> dict | None:
+    """Drive one topic to a final report, resuming from its checkpoint if present; None if it already finished."""
+    usage = UsageMetadataCallbackHandler()
+    config = {
+        "configurable": {"thread_id": job["id"], **job.get("config", {})},
+        "callbacks": [usage],
+    }
+    start = time.perf_counter()
+
+    snapshot = graph.get_state(config)
+    if snapshot.values.get("final_report") and not snapshot.next:
+        # Finished in an earlier run: its report and stats are already written
+        return None
+    if not snapshot.values:
+        # Fresh topic: run until the human_feedback interrupt
+        graph.invoke({"topic": job["topic"], "max_analysts": job["max_analysts"]}, config)
+    elif snapshot.next and snapshot.next != ("human_feedback",):
+        # Crashed mid-run: continue from the last checkpoint
+        graph.invoke(None, config)
+
+    snapshot = graph.get_state(config)
+    if snapshot.next == ("human_feedback",):
+        feedback = job.get("feedback") or []
+        if isinstance(feedback, str):
+            feedback = [feedback]
+
+        # Skip feedback rounds that were applied before a crash; each update records its round number,
+        # since the same feedback text may appear in more than one round
+        rounds = feedback + ["approve"]
+        for index in range(applied_rounds(graph, config), len(rounds)):
+            graph.update_state({**config, "metadata": {"feedback_round": index}},
+                               {"human_analyst_feedback": rounds[index]}, as_node="human_feedback")
+            graph.invoke(None, config)
+
+    snapshot = graph.get_state(config)
+    tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for model_usage in usage.usage_metadata.values():
+        for key in tokens:
+            tokens[key] += model_usage.get(key, 0)
+
+    return {
+        "final_report": snapshot.values.get("final_report", ""),
+        "sections": len(snapshot.values.get("sections", [])),
+        "seconds": round(time.perf_counter() - start, 2),
+        **tokens,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the research assistant over a JSONL batch of topics")
+    parser.add_argument("jobs", type=Path, help="JSONL file with one topic per line")
+    parser.add_argument("--out-dir", type=Path, default=Path("reports"), help="Where reports and stats.jsonl are written")
+    parser.add_argument("--checkpoints", type=Path, default=Path("research_checkpoints.db"), help="SQLite checkpoint database")
+    parser.add_argument("--max-parallel", type=int, default=2, help="Topics researched at the same time")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
+    # One WAL-mode connection shared by all workers; SqliteSaver serializes access itself
+    conn = sqlite3.connect(str(args.checkpoints), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    graph = builder.compile(interrupt_before=["human_feedback"], checkpointer=SqliteSaver(conn))
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.max_parallel) as pool:
+        futures = {pool.submit(run_topic, graph, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            stats = {"id": job["id"], "topic": job["topic"], "max_analysts": job["max_analysts"]}
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                stats.update(status="error", error=str(e))
+                print(f"[error] {job['id']}: {e}", file=sys.stderr)
+            else:
+                if result is None:
+                    print(f"[skip] {job['id']}: already finished")
+                    continue
+                report = result.pop("final_report")
+                (args.out_dir / f"{job['id']}.md").write_text(report, encoding="utf-8")
+                stats.update(status="ok", **result)
+                print(f"[ok] {job['id']} in {result['seconds']}s, {result['total_tokens']} tokens")
+            with (args.out_dir / "stats.jsonl").open("a", encoding="utf-8") as f:
+                f.write(json.dumps(stats) + "\n")
+
+    conn.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+### Keys
+
+def normalize_query(query: str) -> str:
+    """ Normalize a search query so trivially different spellings share a key """
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+def prompt_key(messages: list, **params) -> str:
+    """ Hash a list of messages plus model params into a stable key """
+    payload = [
+        (getattr(m, "type", type(m).__name__), getattr(m, "name", None), getattr(m, "content", m))
+        for m in messages
+    ]
+    raw = json.dumps({"messages": payload, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+### Request coalescing
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Share one in-flight call (and its result) between concurrent callers with the same key.
+
+    This is not a cache: once the leading call returns, the key is forgotten and
+    the next caller starts a fresh call. It only collapses the herd of identical
+    requests that arrive while the first one is still running, e.g. when
+    several analysts fan out on the same topic at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0 # Calls that actually ran
+        self.shared = 0 # Calls served by another caller's in-flight call
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """ Run fn(*args, **kwargs), or wait for the identical call already in flight """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        # Followers block until the leader publishes its outcome
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """ Async variant of do() where fn returns an awaitable """
+
+        # Tasks are bound to a loop, so only coalesce callers on the same loop
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(loop_key)
+            if task is None:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                self._tasks[loop_key] = task
+                self.calls += 1
+                task.add_done_callback(lambda t: self._forget(loop_key, t))
+            else:
+                self.shared += 1
+
+        # Shield so one cancelled caller does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _forget(self, loop_key, task):
+        with self._lock:
+            if self._tasks.get(loop_key) is task:
+                del self._tasks[loop_key]
+
+    def in_flight(self) -> int:
+        """ Number of keys currently being served """
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
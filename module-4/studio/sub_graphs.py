@@ -1,7 +1,13 @@
-from operator import add
-from typing import List, Optional, Annotated
+from typing import Dict, List, Optional, Annotated
 from typing_extensions import TypedDict
+import numpy as np
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
+from langgraph.store.base import BaseStore, GetOp, PutOp
+
+import configuration
+from log_columns import LogTable
+from processed import IdSet, ProcessedLogsChannel, shard_ids
 
 # The structure of the logs
 class Log(TypedDict):
@@ -33,7 +39,7 @@ def get_failures(state):
 def generate_summary(state):
     """ Generate summary of failures """
     failures = state["failures"]
-    # Add fxn: fa_summary = summarize(failures)
+    # Add fxn: fa_summary = summarize(LogTable.from_records(failures).group_by("grader"))
     fa_summary = "Poor quality retrieval of Chroma documentation."
     return {"fa_summary": fa_summary, "processed_logs": [f"failure-analysis-on-log-{failure['id']}" for failure in failures]}
 
@@ -77,27 +83,120 @@ qs_builder.add_edge("send_to_slack", END)
 # Entry Graph
 class EntryGraphState(TypedDict):
     raw_logs: List[Log]
+    log_paths: List[str] # JSONL files to stream logs from, instead of passing raw_logs
     cleaned_logs: List[Log]
-    fa_summary: str # This will only be generated in the FA sub-graph
-    report: str # This will only be generated in the QS sub-graph
-    processed_logs:  Annotated[List[int], add] # This will be generated in BOTH sub-graphs
+    log_offsets: Dict[str, int] # Byte offsets read up to in each of log_paths, saved once the run completes
+    fa_summary: str # This will only be generated in the FA sub-graph (and merged with earlier runs in incremental mode)
+    report: str # This will only be generated in the QS sub-graph (and merged with earlier runs in incremental mode)
+    processed_logs:  Annotated[List[str], ProcessedLogsChannel] # This will be generated in BOTH sub-graphs, stored packed
+
+def watermark_namespace(config: RunnableConfig):
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if configurable.log_mode != "incremental":
+        return None
+    return ("log_analysis", configurable.log_pipeline_id)
+
+def merge_summary(previous: str, new: str) -> str:
+    """ Merge new findings into an earlier summary, keeping each distinct line once """
+    lines = [line for line in previous.splitlines() if line]
+    lines += [line for line in new.splitlines() if line and line not in lines]
+    return "\n".join(lines)
+
+def analyzed_namespace(namespace: tuple) -> tuple:
+    # One item per shard of the analyzed ids, so a run only touches the shards its logs fall in
+    return namespace + ("analyzed",)
+
+def load_analyzed(store: BaseStore, namespace: tuple, ids: List[str]) -> set:
+    """ The ids among ids that earlier runs analyzed, reading only their shards """
+    shards = shard_ids(ids)
+    found = store.batch([GetOp(analyzed_namespace(namespace), key) for key in shards])
+    analyzed = set()
+    for shard, item in zip(shards.values(), found):
+        if item is not None:
+            hits = IdSet(**item.value).isin(shard)
+            analyzed.update(log_id for log_id, hit in zip(shard, hits) if hit)
+    return analyzed
+
+def analyzed_puts(store: BaseStore, namespace: tuple, ids: List[str]) -> List[PutOp]:
+    """ Writes that add ids to the analyzed shards they fall in """
+    shards = shard_ids(ids)
+    found = store.batch([GetOp(analyzed_namespace(namespace), key) for key in shards])
+    puts = []
+    for (key, shard), item in zip(shards.items(), found):
+        analyzed = IdSet.from_ids(shard)
+        if item is not None:
+            analyzed = IdSet(**item.value).union(analyzed)
+        puts.append(PutOp(analyzed_namespace(namespace), key, analyzed.to_json()))
+    return puts
+
+def clean_logs(state, config: RunnableConfig, store: BaseStore):
+
+    """ Load and clean logs, skipping logs analyzed in earlier runs in incremental mode """
+
+    # Watermark from earlier runs of this pipeline, if running incrementally
+    namespace = watermark_namespace(config)
+    watermark = store.get(namespace, "watermark") if namespace and store else None
+    watermark = watermark.value if watermark else {}
+
+    # Get logs, streamed into columns for the id checks below
+    offsets = {}
+    if state.get("log_paths"):
+        # Only read what was appended to each file since the watermark
+        raw_logs, offsets = LogTable.tail_jsonl(state["log_paths"], watermark.get("offsets", {}))
+    else:
+        raw_logs = LogTable.from_records(state.get("raw_logs", []))
+
+    # Skip logs that were already analyzed, e.g. overlapping raw_logs batches
+    if namespace and store and len(raw_logs):
+        ids = raw_logs.ids
+        analyzed = load_analyzed(store, namespace, ids)
+        if analyzed:
+            raw_logs = raw_logs.select(np.array([log_id not in analyzed for log_id in ids], dtype=bool))
 
-def clean_logs(state):
-    # Get logs
-    raw_logs = state["raw_logs"]
     # Data cleaning raw_logs -> docs 
-    cleaned_logs = raw_logs
-    return {"cleaned_logs": cleaned_logs}
-
-entry_builder = StateGraph(EntryGraphState)
+    cleaned_logs = list(raw_logs)
+    return {"cleaned_logs": cleaned_logs, "log_offsets": offsets}
+
+def update_watermark(state, config: RunnableConfig, store: BaseStore):
+
+    """ Advance the watermark and merge this run's findings into the running summaries """
+
+    namespace = watermark_namespace(config)
+    if not namespace or not store:
+        return {}
+    watermark = store.get(namespace, "watermark")
+    watermark = watermark.value if watermark else {}
+
+    # No new logs: the previous summaries still stand
+    new_ids = [log["id"] for log in state["cleaned_logs"]]
+    if not new_ids:
+        if not watermark:
+            return {}
+        store.put(namespace, "watermark", {**watermark, "offsets": {**watermark.get("offsets", {}), **state.get("log_offsets", {})}})
+        return {"fa_summary": watermark["fa_summary"], "report": watermark["report"]}
+
+    fa_summary = merge_summary(watermark.get("fa_summary", ""), state["fa_summary"])
+    report = merge_summary(watermark.get("report", ""), state["report"])
+
+    # Written in one batch only after both sub-graphs finished, so a failed run is retried from the old watermark
+    store.batch(analyzed_puts(store, namespace, new_ids) + [PutOp(namespace, "watermark", {
+        "offsets": {**watermark.get("offsets", {}), **state.get("log_offsets", {})},
+        "fa_summary": fa_summary,
+        "report": report,
+    })])
+    return {"fa_summary": fa_summary, "report": report}
+
+entry_builder = StateGraph(EntryGraphState, config_schema=configuration.Configuration)
 entry_builder.add_node("clean_logs", clean_logs)
 entry_builder.add_node("question_summarization", qs_builder.compile())
 entry_builder.add_node("failure_analysis", fa_builder.compile())
+entry_builder.add_node("update_watermark", update_watermark)
 
 entry_builder.add_edge(START, "clean_logs")
 entry_builder.add_edge("clean_logs", "failure_analysis")
 entry_builder.add_edge("clean_logs", "question_summarization")
-entry_builder.add_edge("failure_analysis", END)
-entry_builder.add_edge("question_summarization", END)
+entry_builder.add_edge("failure_analysis", "update_watermark")
+entry_builder.add_edge("question_summarization", "update_watermark")
+entry_builder.add_edge("update_watermark", END)
 
 graph = entry_builder.compile()
\ No newline at end of file
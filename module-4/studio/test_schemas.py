@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Check that every graph in langgraph.json still has input and output JSON schemas,
+which Studio and the LangGraph server build from the state annotations.
+"""
+import importlib
+import json
+import os
+import sys
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def studio_graphs():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "langgraph.json")) as f:
+        graphs = json.load(f)["graphs"]
+    for name, target in graphs.items():
+        module, attr = target.split(":")
+        yield name, getattr(importlib.import_module(os.path.basename(module)[:-len(".py")]), attr)
+
+def test_graph_schemas():
+    """ Every registered graph returns input and output JSON schemas """
+    for name, graph in studio_graphs():
+        for schema in (graph.get_input_jsonschema(), graph.get_output_jsonschema()):
+            assert schema["type"] == "object", name
+            json.dumps(schema)
+
+if __name__ == "__main__":
+    test_graph_schemas()
+    print("✅ All graph schemas build")
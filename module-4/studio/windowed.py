@@ -0,0 +1,40 @@
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional
+
+def windowed_map(fn: Callable,
+                 items: Iterable,
+                 window: int,
+                 timeout: Optional[Callable[[], Optional[float]]] = None) -> Iterator:
+    """ Yield fn(item) for every item as it completes, with at most window calls in flight.
+
+    Unlike returning a Send per item, items are pulled from the iterable only
+    when a slot frees up, so inputs can be a generator and memory is bounded
+    by the window rather than the number of items. Results are yielded in
+    completion order, so the caller can fold each one into its reducer
+    right away.
+
+    timeout, if given, is called before each wait and returns how many
+    seconds to wait for the next result (None waits indefinitely). When a
+    wait times out, the map stops and the remaining items are dropped.
+    Calls already running cannot be interrupted from here, so a long fn
+    should check a flag the caller sets once it stops iterating.
+    """
+
+    items = iter(items)
+    pool = ThreadPoolExecutor(max_workers=window)
+    try:
+        pending = {pool.submit(fn, item) for item in itertools.islice(items, window)}
+        while pending:
+            done, pending = wait(pending, timeout=timeout() if timeout else None, return_when=FIRST_COMPLETED)
+            if not done:
+                return
+
+            # Refill the window before handing results back
+            for item in itertools.islice(items, len(done)):
+                pending.add(pool.submit(fn, item))
+            for future in done:
+                yield future.result()
+    finally:
+        # Do not block on stragglers if the caller stopped early
+        pool.shutdown(wait=False, cancel_futures=True)
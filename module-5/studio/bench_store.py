@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+bench_store.py
+
+Compare SqliteStore with InMemoryStore on the access pattern of the memory
+agents: every user has a profile, a few memories and a few ToDos in their
+own namespaces, and each turn gets, searches and writes one user's items.
+
+The stores are loaded with --users users (in batches of 1000 puts), then
+timed on --ops random single gets, namespace searches, single puts and
+namespace-prefix listings. SqliteStore runs on a file in a temporary
+directory, with and without compression, and its size on disk is reported.
+
+Usage:
+  python3 bench_store.py --users 100000 --ops 1000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from sqlite_store import SqliteStore
+
+WORDS = "bike coffee sister paris climbing deadline groceries garden piano python marathon dentist".split()
+
+
+def user_items(user: str, rng: random.Random, memories: int, todos: int) -> list[PutOp]:
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    ops = [PutOp(("profile", user), "profile", {"name": user, "location": sentence(2), "interests": sentence(6).split()})]
+    ops += [PutOp(("memories", user), f"m{i}", {"content": f"User {sentence(12)}"}) for i in range(memories)]
+    ops += [PutOp(("todo", user), f"t{i}", {"task": sentence(5), "time_to_complete": rng.randint(5, 120),
+                                             "solutions": [sentence(8) for _ in range(3)], "status": "not started"})
+            for i in range(todos)]
+    return ops
+
+
+def timed(fn, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench(name: str, store, users: list[str], ops: int, memories: int, todos: int, seed: int):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    batch = []
+    for user in users:
+        batch += user_items(user, rng, memories, todos)
+        if len(batch) >= 1000:
+            store.batch(batch)
+            batch = []
+    if batch:
+        store.batch(batch)
+    load = time.perf_counter() - start
+
+    picks = [rng.choice(users) for _ in range(ops)]
+    get = timed(lambda i: store.get(("profile", picks[i]), "profile"), ops)
+    search = timed(lambda i: store.search(("memories", picks[i])), ops)
+    put = timed(lambda i: store.put(("memories", picks[i]), "latest", {"content": f"User said {i}"}), ops)
+    listing = timed(lambda i: store.list_namespaces(prefix=("todo",), limit=100, offset=i * 100 % len(users)),
+                    max(ops // 10, 1))
+    print(f"{name:>18}: load {load:7.2f}s | get {get:8.1f}us | search {search:9.1f}us | "
+          f"put {put:8.1f}us | list_namespaces {listing:9.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SqliteStore vs InMemoryStore for the memory agents")
+    parser.add_argument("--users", type=int, default=100_000, help="Users loaded into each store")
+    parser.add_argument("--ops", type=int, default=1000, help="Timed operations of each kind")
+    parser.add_argument("--memories", type=int, default=3, help="Memories per user")
+    parser.add_argument("--todos", type=int, default=2, help="ToDos per user")
+    parser.add_argument("--compress-threshold", type=int, default=256, help="Bytes at which the compressed SqliteStore compresses a value")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    users = [f"user-{i}" for i in range(args.users)]
+    print(f"{args.users} users, {1 + args.memories + args.todos} items each, {args.ops} timed ops per kind (mean latency)")
+
+    bench("InMemoryStore", InMemoryStore(), users, args.ops, args.memories, args.todos, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, threshold in [("SqliteStore", None), ("SqliteStore+zlib", args.compress_threshold)]:
+            path = os.path.join(tmp, f"{threshold}.db")
+            with SqliteStore.from_conn_string(path, compress_threshold=threshold) as store:
+                bench(name, store, users, args.ops, args.memories, args.todos, args.seed)
+                store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            print(f"{'':>18}  {os.path.getsize(path) / 2**20:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,10 @@ from dataclasses import dataclass
 class Configuration:
     """The configurable fields for the chatbot."""
     user_id: str = "default-user"
+    memory_gate: str = "off" # "off" always writes, "heuristic" skips write_memory on bare acknowledgements (e.g. "thanks!") that answer no question
+    memory_top_k: int = 5 # Memories in the chatbot prompt per turn in memoryschema_collection, most relevant to the latest messages (write_memory still sees all of them)
+    memory_write_mode: str = "sync" # "sync" writes memories before the run ends, "background" queues them to run after the reply
+    extraction_overlap: int = 4 # Messages before a thread's extraction watermark that are re-sent to Trustcall for context
 
     @classmethod
     def from_runnable_config(
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+consolidate_memories.py
+
+Offline consolidation of the memory collections written by
+memoryschema_collection.py ("memories", user_id) and memory_agent.py
+("todo", user_id), or module-6's ("todo", category, user_id).
+
+For every namespace under each collection prefix, across all users:
+
+  - near-duplicate documents are clustered by cosine similarity of their
+    hash_embed() vectors (one matrix product per namespace), every pair in
+    a cluster at least --threshold apart, and each cluster is merged into
+    its most recently updated document. The documents merged away are moved
+    to a cold namespace, ("memories_archive", ...) or ("todo_archive", ...),
+    which the agents never search;
+  - ToDos whose status is "done" or "archived" are moved to the same cold
+    namespace.
+
+All deletes and writes for a namespace go to the store in one batch. Run
+it on a schedule (e.g. nightly cron); --dry-run reports what would change.
+
+Usage:
+  python3 consolidate_memories.py --postgres-uri postgresql://... --threshold 0.8 --dry-run
+  python3 consolidate_memories.py --sqlite memories.db
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+import numpy as np
+
+from langgraph.store.base import BaseStore, Item, PutOp
+
+from memory_index import hash_embed
+
+
+def memory_text(value: dict) -> str:
+    return value.get("content", "")
+
+
+def todo_text(value: dict) -> str:
+    return value.get("task", "")
+
+
+def merge_memories(items: list[Item]) -> dict:
+    """Keep the newest wording; near-duplicates carry the same fact."""
+    return max(items, key=lambda item: item.updated_at).value
+
+
+def merge_todos(items: list[Item]) -> dict:
+    """Keep the newest ToDo, with the solutions of every duplicate folded in."""
+    newest = max(items, key=lambda item: item.updated_at)
+    solutions = []
+    for item in sorted(items, key=lambda item: item.updated_at, reverse=True):
+        solutions += [s for s in item.value.get("solutions", []) if s not in solutions]
+    return dict(newest.value, solutions=solutions)
+
+
+@dataclass
+class Collection:
+    prefix: str
+    text: Callable[[dict], str]
+    merge: Callable[[list[Item]], dict]
+    archive_statuses: tuple[str, ...] = ()
+
+
+COLLECTIONS = [
+    Collection("memories", memory_text, merge_memories),
+    Collection("todo", todo_text, merge_todos, archive_statuses=("done", "archived")),
+]
+
+
+@dataclass
+class Report:
+    namespaces: int = 0
+    documents: int = 0
+    merged: int = 0
+    archived: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    per_namespace: list[dict] = field(default_factory=list)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def value_bytes(value: dict) -> int:
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def list_namespaces(store: BaseStore, prefix: str, page_size: int = 1000) -> Iterator[tuple[str, ...]]:
+    offset = 0
+    while True:
+        page = store.list_namespaces(prefix=(prefix,), limit=page_size, offset=offset)
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def load_items(store: BaseStore, namespace: tuple[str, ...], page_size: int = 500) -> list[Item]:
+    items, offset = [], 0
+    while True:
+        page = store.search(namespace, limit=page_size, offset=offset)
+        items += page
+        if len(page) < page_size:
+            return items
+        offset += page_size
+
+
+def cluster(texts: list[str], threshold: float) -> list[list[int]]:
+    """Group indices so that every pair within a group has cosine similarity >= threshold.
+
+    Complete linkage, greedily in input order: an index joins the first group
+    it is similar to in full, or starts a new one. Unlike grouping similar
+    pairs transitively, a chain A~B~C never puts A and C together unless
+    they are near-duplicates themselves.
+    """
+    if len(texts) < 2:
+        return [[i] for i in range(len(texts))]
+
+    vectors = hash_embed(texts)
+    similar = vectors @ vectors.T >= threshold
+
+    groups: list[list[int]] = []
+    for i in range(len(texts)):
+        for group in groups:
+            if similar[i, group].all():
+                group.append(i)
+                break
+        else:
+            groups.append([i])
+    return groups
+
+
+def consolidate_namespace(store: BaseStore, namespace: tuple[str, ...], collection: Collection,
+                          threshold: float, dry_run: bool = False) -> dict:
+    items = load_items(store, namespace)
+    ops = []
+    archived = merged = 0
+    before = sum(value_bytes(item.value) for item in items)
+    after = before
+
+    # Retire finished ToDos to the cold namespace
+    cold = (f"{namespace[0]}_archive",) + namespace[1:]
+    active = []
+    for item in items:
+        if item.value.get("status") in collection.archive_statuses:
+            ops += [PutOp(cold, item.key, item.value), PutOp(namespace, item.key, None)]
+            after -= value_bytes(item.value)
+            archived += 1
+        else:
+            active.append(item)
+
+    # Merge each cluster of near-duplicates into its newest document; newest first, so each
+    # cluster is built around the document it is merged into
+    active.sort(key=lambda item: item.updated_at, reverse=True)
+    for group in cluster([collection.text(item.value) for item in active], threshold):
+        if len(group) < 2:
+            continue
+        members = [active[i] for i in group]
+        keep = max(members, key=lambda item: item.updated_at)
+        value = collection.merge(members)
+        ops.append(PutOp(namespace, keep.key, value))
+        after += value_bytes(value) - sum(value_bytes(item.value) for item in members)
+        for item in members:
+            if item.key != keep.key:
+                # The merged-away document is kept in the cold namespace, so no fact is lost for good
+                ops += [PutOp(cold, item.key, item.value), PutOp(namespace, item.key, None)]
+                merged += 1
+
+    if ops and not dry_run:
+        store.batch(ops)
+    return {"namespace": list(namespace), "documents": len(items), "merged": merged,
+            "archived": archived, "bytes_before": before, "bytes_after": after}
+
+
+def consolidate(store: BaseStore, threshold: float = 0.8, dry_run: bool = False,
+                collections: list[Collection] = COLLECTIONS) -> Report:
+    """Consolidate every user's memory collections in the store."""
+    report = Report()
+    for collection in collections:
+        for namespace in list(list_namespaces(store, collection.prefix)):
+            stats = consolidate_namespace(store, namespace, collection, threshold, dry_run)
+            report.namespaces += 1
+            report.documents += stats["documents"]
+            report.merged += stats["merged"]
+            report.archived += stats["archived"]
+            report.bytes_before += stats["bytes_before"]
+            report.bytes_after += stats["bytes_after"]
+            report.per_namespace.append(stats)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge near-duplicate memories and archive finished ToDos")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--postgres-uri", help="Connection string of the deployment's Postgres store")
+    source.add_argument("--sqlite", help="Path of a local SqliteStore database (MEMORY_STORE_PATH)")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Cosine similarity at which documents are merged")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--verbose", action="store_true", help="Print stats for every namespace")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from sqlite_store import SqliteStore as Store
+        conn_string = args.sqlite
+    else:
+        from langgraph.store.postgres import PostgresStore as Store
+        conn_string = args.postgres_uri
+
+    with Store.from_conn_string(conn_string) as store:
+        report = consolidate(store, args.threshold, args.dry_run)
+
+    if args.verbose:
+        for stats in report.per_namespace:
+            print(json.dumps(stats))
+    action = "Would save" if args.dry_run else "Saved"
+    print(f"{report.namespaces} namespaces, {report.documents} documents: "
+          f"{report.merged} merged away, {report.archived} archived. "
+          f"{action} {report.bytes_saved} bytes ({report.bytes_before} -> {report.bytes_after}) in the searched namespaces")
+
+
+if __name__ == "__main__":
+    main()
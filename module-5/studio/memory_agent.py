@@ -5,38 +5,54 @@ from pydantic import BaseModel, Field
 
 from trustcall import create_extractor
 
-from typing import Literal, Optional, TypedDict
+from typing import List, Literal, Optional, TypedDict, Union
 
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import merge_message_runs
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
 
 from langchain_openai import ChatOpenAI
 
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import Send
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
 import configuration
+from memory_cache import NamespaceCache
+from memory_queue import MemoryWriteQueue
+from sqlite_store import store_from_env
 
 ## Utilities 
 
 # Inspect the tool calls for Trustcall
-class Spy:
+class Spy(BaseCallbackHandler):
+    """Callback that records the tool calls of every chat model call as it ends.
+
+    Added to the invoke config's callbacks (see with_spy), so it hooks each
+    model call directly instead of walking the finished run tree.
+    """
+    run_inline = True
+
     def __init__(self):
         self.called_tools = []
 
-    def __call__(self, run):
-        q = [run]
-        while q:
-            r = q.pop()
-            if r.child_runs:
-                q.extend(r.child_runs)
-            if r.run_type == "chat_model":
-                self.called_tools.append(
-                    r.outputs["generations"][0][0]["message"]["kwargs"]["tool_calls"]
-                )
+    def on_llm_end(self, response, **kwargs):
+        message = getattr(response.generations[0][0], "message", None)
+        if message is not None:
+            self.called_tools.append(message.tool_calls)
+
+def with_spy(config: RunnableConfig, spy: Spy) -> RunnableConfig:
+    """Callbacks of the node's config plus the spy, so tracing and streaming still see the call."""
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(spy)
+    else:
+        callbacks = [*(callbacks or []), spy]
+    return {"callbacks": callbacks}
 
 # Extract information from tool calls for both patches and new memories in Trustcall
 def extract_tool_info(tool_calls, schema_name="Memory"):
@@ -127,13 +143,66 @@ class UpdateMemory(TypedDict):
 # Initialize the model
 model = ChatOpenAI(model="gpt-4o", temperature=0)
 
-## Create the Trustcall extractors for updating the user profile and ToDo list
+# Per-process cache of memory namespaces, invalidated by every write below
+memory_cache = NamespaceCache()
+
+# Memory updates queued to run after the reply, in order per user
+memory_writes = MemoryWriteQueue()
+
+## Create the Trustcall extractors for updating the user profile and ToDo list,
+## and the chat model bound to the UpdateMemory tool, once at startup
 profile_extractor = create_extractor(
     model,
     tools=[Profile],
     tool_choice="Profile",
 )
 
+todo_extractor = create_extractor(
+    model,
+    tools=[ToDo],
+    tool_choice="ToDo",
+    enable_inserts=True
+)
+
+model_with_tools = model.bind_tools([UpdateMemory])
+
+## Extraction watermarks
+
+def watermark_key(config: RunnableConfig, kind: str):
+    """ Store namespace and key of the thread's watermark for one extractor, or None without a thread """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if thread_id is None:
+        return None
+    return ("extraction_watermark", configurable.user_id), f"{kind}:{thread_id}"
+
+def extraction_window(store: BaseStore, config: RunnableConfig, kind: str, messages: list) -> list:
+    """ Messages after the last one the extractor has already seen on this thread, plus an overlap
+    window before it for context. The extractor also gets the existing documents, so older
+    messages add tokens but nothing it does not already know. """
+
+    key = watermark_key(config, kind)
+    item = store.get(*key) if key else None
+    if item is None:
+        return messages
+
+    # Fall back to the whole history if the watermarked message is gone (e.g. trimmed)
+    ids = [message.id for message in messages]
+    if item.value["message_id"] not in ids:
+        return messages
+    overlap = int(configuration.Configuration.from_runnable_config(config).extraction_overlap)
+    start = max(ids.index(item.value["message_id"]) + 1 - overlap, 0)
+    # Never open on a tool result whose tool call was cut off
+    while 0 < start < len(messages) and isinstance(messages[start], ToolMessage):
+        start -= 1
+    return messages[start:]
+
+def save_watermark(store: BaseStore, config: RunnableConfig, kind: str, messages: list):
+    """ Record the last message the extractor has seen, once its updates are saved """
+    key = watermark_key(config, kind)
+    if key and messages and messages[-1].id:
+        store.put(*key, {"message_id": messages[-1].id})
+
 ## Prompts 
 
 # Chatbot instruction for choosing what to update and what tools to call 
@@ -169,6 +238,7 @@ Here are your instructions for reasoning about the user's messages:
 - If personal information was provided about the user, update the user's profile by calling UpdateMemory tool with type `user`
 - If tasks are mentioned, update the ToDo list by calling UpdateMemory tool with type `todo`
 - If the user has specified preferences for how to update the ToDo list, update the instructions by calling UpdateMemory tool with type `instructions`
+- If more than one of these applies, call UpdateMemory once for each type in the same response
 
 3. Tell the user that you have updated your memory, if appropriate:
 - Do not tell the user you have updated the user's profile
@@ -201,6 +271,10 @@ Your current instructions are:
 
 ## Node definitions
 
+# State sent to an update node: the chat history and the UpdateMemory calls it answers
+class UpdateState(MessagesState):
+    tool_call_ids: List[str]
+
 def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
@@ -209,9 +283,13 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     configurable = configuration.Configuration.from_runnable_config(config)
     user_id = configurable.user_id
 
+    # Load the profile, ToDo and instruction namespaces in one batched round trip;
+    # the reads below are then served from the cache
+    memory_cache.search_many(store, [("profile", user_id), ("todo", user_id), ("instructions", user_id)])
+
    # Retrieve profile memory from the store
     namespace = ("profile", user_id)
-    memories = store.search(namespace)
+    memories = memory_cache.search(store, namespace)
     if memories:
         user_profile = memories[0].value
     else:
@@ -219,12 +297,11 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     # Retrieve people memory from the store
     namespace = ("todo", user_id)
-    memories = store.search(namespace)
-    todo = "\n".join(f"{mem.value}" for mem in memories)
+    todo = memory_cache.render(store, namespace, "todo", lambda memories: "\n".join(f"{mem.value}" for mem in memories))
 
     # Retrieve custom instructions
     namespace = ("instructions", user_id)
-    memories = store.search(namespace)
+    memories = memory_cache.search(store, namespace)
     if memories:
         instructions = memories[0].value
     else:
@@ -233,11 +310,11 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     system_msg = MODEL_SYSTEM_MESSAGE.format(user_profile=user_profile, todo=todo, instructions=instructions)
 
     # Respond using memory as well as the chat history
-    response = model.bind_tools([UpdateMemory], parallel_tool_calls=False).invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model_with_tools.invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": [response]}
 
-def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def extract_profile(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -249,7 +326,7 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
     namespace = ("profile", user_id)
 
     # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    existing_items = memory_cache.search(store, namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "Profile"
@@ -261,23 +338,22 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
 
     # Merge the chat history and the instruction
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    # Only the messages since the last profile extraction on this thread, plus an overlap, go to Trustcall
+    messages = extraction_window(store, config, "profile", state["messages"][:-1])
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + messages))
 
     # Invoke the extractor
     result = profile_extractor.invoke({"messages": updated_messages, 
                                          "existing": existing_memories})
 
-    # Save save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
-    tool_calls = state['messages'][-1].tool_calls
-    # Return tool message with update verification
-    return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_calls[0]['id']}]}
+    # Save save the memories from Trustcall to the store, in one batched write
+    memory_cache.put_many(store, namespace,
+                          [(rmeta.get("json_doc_id", str(uuid.uuid4())), r.model_dump(mode="json"))
+                           for r, rmeta in zip(result["responses"], result["response_metadata"])])
+    save_watermark(store, config, "profile", messages)
+    return "updated profile"
 
-def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def extract_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -289,7 +365,7 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
     namespace = ("todo", user_id)
 
     # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    existing_items = memory_cache.search(store, namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "ToDo"
@@ -301,38 +377,28 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     # Merge the chat history and the instruction
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    # Only the messages since the last ToDo extraction on this thread, plus an overlap, go to Trustcall
+    messages = extraction_window(store, config, "todo", state["messages"][:-1])
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + messages))
 
     # Initialize the spy for visibility into the tool calls made by Trustcall
     spy = Spy()
-    
-    # Create the Trustcall extractor for updating the ToDo list 
-    todo_extractor = create_extractor(
-    model,
-    tools=[ToDo],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
 
     # Invoke the extractor
     result = todo_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+                                         "existing": existing_memories},
+                                   config=with_spy(config, spy))
 
-    # Save save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
-        
-    # Respond to the tool call made in task_mAIstro, confirming the update    
-    tool_calls = state['messages'][-1].tool_calls
+    # Save save the memories from Trustcall to the store, in one batched write
+    memory_cache.put_many(store, namespace,
+                          [(rmeta.get("json_doc_id", str(uuid.uuid4())), r.model_dump(mode="json"))
+                           for r, rmeta in zip(result["responses"], result["response_metadata"])])
+    save_watermark(store, config, "todo", messages)
 
-    # Extract the changes made by Trustcall and add the the ToolMessage returned to task_mAIstro
-    todo_update_msg = extract_tool_info(spy.called_tools, tool_name)
-    return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id":tool_calls[0]['id']}]}
+    # Extract the changes made by Trustcall for the ToolMessage returned to task_mAIstro
+    return extract_tool_info(spy.called_tools, tool_name)
 
-def update_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def extract_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -342,7 +408,7 @@ def update_instructions(state: MessagesState, config: RunnableConfig, store: Bas
     
     namespace = ("instructions", user_id)
 
-    existing_memory = store.get(namespace, "user_instructions")
+    existing_memory = next((item for item in memory_cache.search(store, namespace) if item.key == "user_instructions"), None)
         
     # Format the memory in the system prompt
     system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
@@ -350,28 +416,54 @@ def update_instructions(state: MessagesState, config: RunnableConfig, store: Bas
 
     # Overwrite the existing memory in the store 
     key = "user_instructions"
-    store.put(namespace, key, {"memory": new_memory.content})
-    tool_calls = state['messages'][-1].tool_calls
-    # Return tool message with update verification
-    return {"messages": [{"role": "tool", "content": "updated instructions", "tool_call_id":tool_calls[0]['id']}]}
+    memory_cache.put(store, namespace, key, {"memory": new_memory.content})
+    return "updated instructions"
+
+def run_memory_update(state: UpdateState, config: RunnableConfig, store: BaseStore, kind: str, extract, queued_msg: str):
+
+    """Run an extraction now, or queue it to run after the reply in background mode, and answer the tool calls."""
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    background = configurable.memory_write_mode == "background"
+
+    # Coalesce per thread: a newer queued update for the same conversation supersedes an older one
+    thread_id = config.get("configurable", {}).get("thread_id")
+    content = memory_writes.run(background, configurable.user_id, (kind, thread_id), extract, state, config, store)
+
+    # Respond to each tool call made in task_mAIstro for this update type, so it can reply without waiting on the extraction
+    content = queued_msg if background else content
+    return {"messages": [{"role": "tool", "content": content, "tool_call_id":tool_call_id} for tool_call_id in state["tool_call_ids"]]}
+
+def update_profile(state: UpdateState, config: RunnableConfig, store: BaseStore):
+    return run_memory_update(state, config, store, "profile", extract_profile, "profile update queued, it will be saved after this reply")
+
+def update_todos(state: UpdateState, config: RunnableConfig, store: BaseStore):
+    return run_memory_update(state, config, store, "todo", extract_todos, "ToDo list update queued, it will be saved after this reply")
+
+def update_instructions(state: UpdateState, config: RunnableConfig, store: BaseStore):
+    return run_memory_update(state, config, store, "instructions", extract_instructions, "instructions update queued, they will be saved after this reply")
 
 # Conditional edge
-def route_message(state: MessagesState, config: RunnableConfig, store: BaseStore) -> Literal[END, "update_todos", "update_instructions", "update_profile"]:
+UPDATE_NODES = {"user": "update_profile", "todo": "update_todos", "instructions": "update_instructions"}
+
+def route_message(state: MessagesState, config: RunnableConfig, store: BaseStore) -> Union[Literal[END], List[Send]]:
 
-    """Reflect on the memories and chat history to decide whether to update the memory collection."""
+    """Reflect on the memories and chat history to decide whether to update the memory collection.
+
+    Every UpdateMemory call in the message is answered: calls are grouped by update type and each
+    type is sent to its update node, so the profile, ToDo list and instructions update in parallel."""
     message = state['messages'][-1]
     if len(message.tool_calls) ==0:
         return END
-    else:
-        tool_call = message.tool_calls[0]
-        if tool_call['args']['update_type'] == "user":
-            return "update_profile"
-        elif tool_call['args']['update_type'] == "todo":
-            return "update_todos"
-        elif tool_call['args']['update_type'] == "instructions":
-            return "update_instructions"
-        else:
-            raise ValueError
+
+    tool_call_ids = {}
+    for tool_call in message.tool_calls:
+        update_type = tool_call['args'].get('update_type')
+        if update_type not in UPDATE_NODES:
+            raise ValueError(f"Unknown update_type: {update_type}")
+        tool_call_ids.setdefault(update_type, []).append(tool_call['id'])
+    return [Send(UPDATE_NODES[update_type], {"messages": state["messages"], "tool_call_ids": ids})
+            for update_type, ids in tool_call_ids.items()]
 
 # Create the graph + all nodes
 builder = StateGraph(MessagesState, config_schema=configuration.Configuration)
@@ -384,10 +476,11 @@ builder.add_node(update_instructions)
 
 # Define the flow 
 builder.add_edge(START, "task_mAIstro")
-builder.add_conditional_edges("task_mAIstro", route_message)
+builder.add_conditional_edges("task_mAIstro", route_message, ["update_todos", "update_profile", "update_instructions", END])
 builder.add_edge("update_todos", "task_mAIstro")
 builder.add_edge("update_profile", "task_mAIstro")
 builder.add_edge("update_instructions", "task_mAIstro")
 
 # Compile the graph
-graph = builder.compile()
\ No newline at end of file
+# A local SQLite store when MEMORY_STORE_PATH is set; otherwise the server provides the store
+graph = builder.compile(store=store_from_env())
\ No newline at end of file
@@ -0,0 +1,48 @@
+import re
+from typing import List, Literal
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langchain_core.runnables.config import RunnableConfig
+from langgraph.graph import END, MessagesState
+
+import configuration
+
+WORD = re.compile(r"[a-z0-9']+")
+
+# Whole messages that never carry anything worth remembering
+ACKNOWLEDGEMENTS = frozenset("""
+ok okay k kk sure yes yep yeah no nope thanks thank you thx ty cool great nice awesome perfect
+got it sounds good lol haha hi hey hello bye goodbye good night morning see you later np
+""".split())
+
+def turn_messages(messages: List[AnyMessage]) -> List[AnyMessage]:
+    """ Messages of the latest turn, starting with the AI response the user was replying to """
+    end = len(messages)
+    # Skip the response this turn just produced
+    while end and isinstance(messages[end - 1], AIMessage):
+        end -= 1
+    start = end
+    while start and not isinstance(messages[start - 1], AIMessage):
+        start -= 1
+    # Keep the previous AI response: "Pittsburgh" only means something next to "Where do you live?"
+    return messages[max(start - 1, 0):end]
+
+def plausible_memory_update(messages: List[AnyMessage]) -> bool:
+    """ Cheap local check: False only for a bare acknowledgement that answers no question """
+
+    if messages and isinstance(messages[0], AIMessage) and "?" in str(messages[0].content):
+        return True
+    text = " ".join(str(m.content) for m in messages if isinstance(m, HumanMessage)).lower()
+    words = WORD.findall(text)
+    return bool(words) and not all(word in ACKNOWLEDGEMENTS for word in words)
+
+def should_write_memory(state: MessagesState, config: RunnableConfig) -> Literal["write_memory", END]:
+
+    """ Route to write_memory only when the latest turn could plausibly change the memory """
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if configurable.memory_gate == "off":
+        return "write_memory"
+    if plausible_memory_update(turn_messages(state["messages"])):
+        return "write_memory"
+    return END
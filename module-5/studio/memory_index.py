@@ -0,0 +1,163 @@
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langgraph.store.base import BaseStore, Item
+
+TOKEN = re.compile(r"\w+")
+
+# Words that appear in nearly every extracted memory and carry no topic
+STOPWORDS = frozenset("a an and are as at be by for from has have i in is it of on or that the their to user was with".split())
+
+def _trigrams(text: str) -> List[str]:
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+def hash_embed(texts: Sequence[str], dim: int = 2048) -> np.ndarray:
+    """ Embed texts as L2-normalized, signed hashes of their words, word bigrams and
+    character trigrams (so "bike" and "biking" still overlap).
+
+    Needs no model, vocabulary or network access, and is stable across
+    processes (crc32 rather than Python's salted hash()).
+    """
+
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        words = [word for word in TOKEN.findall(text.lower()) if word not in STOPWORDS]
+        features = [(word, 1.0) for word in words]
+        features += [(f"{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+        features += [(f"#{gram}", 0.5) for word in words for gram in _trigrams(f" {word} ")]
+        for feature, weight in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Sign from the top bit, independent of the bucket, so collisions cancel out on average
+            matrix[row, h % dim] += weight if h >> 31 else -weight
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+class _Namespace:
+    def __init__(self, items: List[Item], vectors: np.ndarray):
+        self.items = items
+        self.rows = {item.key: row for row, item in enumerate(items)}
+        self.vectors = vectors # Capacity may exceed len(items); rows past it are unused
+        self.loaded_at = time.monotonic()
+
+class MemoryIndex:
+    """Per-process vector index over the memories in each store namespace.
+
+    Every memory is embedded once, when it is loaded or written through put(),
+    and kept as a row of one NumPy matrix per namespace. search() then scores
+    a query against the whole namespace with a single matrix-vector product
+    and returns only the top-k items, instead of every memory the user has.
+
+    Like the other caches here it assumes one store per process; a namespace
+    is reloaded from the store once it is older than ttl seconds, and only
+    the items that are new or changed since the last load are re-embedded.
+    """
+
+    def __init__(self,
+                 text: Callable[[dict], str] = lambda value: value.get("content", ""),
+                 embed: Callable[[Sequence[str]], np.ndarray] = hash_embed,
+                 ttl: Optional[float] = 30.0,
+                 page_size: int = 100):
+        self.text = text
+        self.embed = embed
+        self.ttl = ttl
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._namespaces: Dict[Tuple[str, ...], _Namespace] = {}
+
+    def _load(self, store: BaseStore, namespace: Tuple[str, ...]) -> _Namespace:
+        with self._lock:
+            index = self._namespaces.get(namespace)
+        if index is not None and (self.ttl is None or time.monotonic() - index.loaded_at <= self.ttl):
+            return index
+
+        # Page through the whole namespace; store.search() alone returns only the first page
+        items, offset = [], 0
+        while True:
+            page = store.search(namespace, limit=self.page_size, offset=offset)
+            items.extend(page)
+            if len(page) < self.page_size:
+                break
+            offset += self.page_size
+
+        index = _Namespace(items, self._embed_changed(index, items))
+        with self._lock:
+            self._namespaces[namespace] = index
+        return index
+
+    def _embed_changed(self, previous: Optional[_Namespace], items: List[Item]) -> np.ndarray:
+        """ Vectors for items, reusing the previous load's for items that have not changed """
+
+        rows, old_items = {}, []
+        if previous is not None:
+            with self._lock:
+                rows, old_items, old_vectors = dict(previous.rows), list(previous.items), previous.vectors
+
+        reused, stale = [], []
+        for row, item in enumerate(items):
+            old = rows.get(item.key)
+            # put() stamps its own time, so an unchanged value also counts as unchanged
+            if old is not None and (old_items[old].updated_at == item.updated_at or old_items[old].value == item.value):
+                reused.append((row, old))
+            else:
+                stale.append(row)
+        if not reused:
+            return self.embed([self.text(item.value) for item in items])
+
+        # Embed only new and changed items
+        vectors = np.zeros((len(items), old_vectors.shape[1]), dtype=old_vectors.dtype)
+        new_rows, old_rows = zip(*reused)
+        vectors[list(new_rows)] = old_vectors[list(old_rows)]
+        if stale:
+            vectors[stale] = self.embed([self.text(items[row].value) for row in stale])
+        return vectors
+
+    def items(self, store: BaseStore, namespace: Tuple[str, ...]) -> List[Item]:
+        """ Every memory in namespace, served from the index's copy while it is fresh """
+
+        index = self._load(store, namespace)
+        with self._lock:
+            return list(index.items)
+
+    def search(self, store: BaseStore, namespace: Tuple[str, ...], query: str, k: int = 5) -> List[Item]:
+        """ The k memories in namespace most similar to query, best first """
+
+        index = self._load(store, namespace)
+        with self._lock:
+            items = list(index.items)
+            vectors = index.vectors[:len(items)]
+        if len(items) <= k:
+            return items
+
+        scores = vectors @ self.embed([query])[0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [items[row] for row in top[np.argsort(-scores[top], kind="stable")]]
+
+    def put(self, store: BaseStore, namespace: Tuple[str, ...], key: str, value: dict):
+        """ store.put() that also embeds the value into the namespace's matrix """
+
+        store.put(namespace, key, value)
+        index = self._load(store, namespace)
+        vector = self.embed([self.text(value)])[0]
+        now = datetime.now(timezone.utc)
+
+        with self._lock:
+            row = index.rows.get(key)
+            if row is None:
+                row = len(index.items)
+                # Grow the matrix geometrically so appends stay amortized O(dim)
+                if row == len(index.vectors):
+                    grown = np.zeros((max(2 * row, 8), index.vectors.shape[1]), dtype=index.vectors.dtype)
+                    grown[:row] = index.vectors
+                    index.vectors = grown
+                index.items.append(Item(value=value, key=key, namespace=namespace, created_at=now, updated_at=now))
+                index.rows[key] = row
+            else:
+                old = index.items[row]
+                index.items[row] = Item(value=value, key=key, namespace=namespace, created_at=old.created_at, updated_at=now)
+            index.vectors[row] = vector
@@ -4,10 +4,16 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from memory_gate import should_write_memory
+from memory_queue import MemoryWriteQueue
+from sqlite_store import store_from_env
 
 # Initialize the LLM
 model = ChatOpenAI(model="gpt-4o", temperature=0) 
 
+# Memory writes queued to run after the reply, in order per user
+memory_writes = MemoryWriteQueue()
+
 # Chatbot instruction
 MODEL_SYSTEM_MESSAGE = """You are a helpful assistant with memory that provides information about the user. 
 If you have memory for this user, use it to personalize your responses.
@@ -65,7 +71,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     return {"messages": response}
 
-def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def extract_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and save a memory to the store."""
     
@@ -94,11 +100,22 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
     key = "user_memory"
     store.put(namespace, key, {"memory": new_memory.content})
 
+def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+
+    """Save a memory now, or queue it to be saved after the reply in background mode."""
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    background = configurable.memory_write_mode == "background"
+    # Coalesce per thread: a newer queued write for the same conversation supersedes an older one
+    thread_id = config.get("configurable", {}).get("thread_id")
+    memory_writes.run(background, configurable.user_id, ("memory", thread_id), extract_memory, state, config, store)
+
 # Define the graph
 builder = StateGraph(MessagesState,config_schema=configuration.Configuration)
 builder.add_node("call_model", call_model)
 builder.add_node("write_memory", write_memory)
 builder.add_edge(START, "call_model")
-builder.add_edge("call_model", "write_memory")
+builder.add_conditional_edges("call_model", should_write_memory, ["write_memory", END])
 builder.add_edge("write_memory", END)
-graph = builder.compile()
\ No newline at end of file
+# A local SQLite store when MEMORY_STORE_PATH is set; otherwise the server provides the store
+graph = builder.compile(store=store_from_env())
\ No newline at end of file
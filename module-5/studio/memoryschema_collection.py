@@ -4,17 +4,27 @@ from pydantic import BaseModel, Field
 
 from trustcall import create_extractor
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.messages import merge_message_runs
 from langchain_core.runnables.config import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from memory_gate import should_write_memory
+from memory_index import MemoryIndex
+from memory_queue import MemoryWriteQueue
+from sqlite_store import store_from_env
 
 # Initialize the LLM
 model = ChatOpenAI(model="gpt-4o", temperature=0) 
 
+# Memory writes queued to run after the reply, in order per user
+memory_writes = MemoryWriteQueue()
+
+# Vector index over each user's memories, so only the relevant ones reach the prompt
+memory_index = MemoryIndex()
+
 # Memory schema
 class Memory(BaseModel):
     content: str = Field(description="The main content of the memory. For example: User expressed interest in learning about French.")
@@ -43,6 +53,12 @@ TRUSTCALL_INSTRUCTION = """Reflect on following interaction.
 Use the provided tools to retain any necessary memories about the user. 
 
 Use parallel tool calling to handle updates and insertions simultaneously:"""
+
+def recent_user_text(messages, n: int = 3) -> str:
+    """ Text of the last n user messages, used as the memory retrieval query """
+    user_messages = [str(m.content) for m in messages if isinstance(m, HumanMessage)]
+    return "\n".join(user_messages[-n:])
+
 def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Load memory from the store and use it to personalize the chatbot's response."""
@@ -53,9 +69,9 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
     # Get the user ID from the config
     user_id = configurable.user_id
 
-    # Retrieve memory from the store
+    # Retrieve the memories most relevant to the latest user messages
     namespace = ("memories", user_id)
-    memories = store.search(namespace)
+    memories = memory_index.search(store, namespace, recent_user_text(state["messages"]), int(configurable.memory_top_k))
 
     # Format the memories for the system prompt
     info = "\n".join(f"- {mem.value['content']}" for mem in memories)
@@ -66,7 +82,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     return {"messages": response}
 
-def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def extract_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and save a memory to the store."""
     
@@ -79,8 +95,8 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
     # Define the namespace for the memories
     namespace = ("memories", user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Retrieve every memory, so Trustcall can update any of them instead of inserting a duplicate
+    existing_items = memory_index.items(store, namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "Memory"
@@ -99,16 +115,27 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     # Save the memories from Trustcall to the store
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
+        memory_index.put(store, namespace,
+                         rmeta.get("json_doc_id", str(uuid.uuid4())),
+                         r.model_dump(mode="json"),
             )
 
+def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+
+    """Save a memory now, or queue it to be saved after the reply in background mode."""
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    background = configurable.memory_write_mode == "background"
+    # Coalesce per thread: a newer queued write for the same conversation supersedes an older one
+    thread_id = config.get("configurable", {}).get("thread_id")
+    memory_writes.run(background, configurable.user_id, ("memories", thread_id), extract_memory, state, config, store)
+
 # Define the graph
 builder = StateGraph(MessagesState,config_schema=configuration.Configuration)
 builder.add_node("call_model", call_model)
 builder.add_node("write_memory", write_memory)
 builder.add_edge(START, "call_model")
-builder.add_edge("call_model", "write_memory")
+builder.add_conditional_edges("call_model", should_write_memory, ["write_memory", END])
 builder.add_edge("write_memory", END)
-graph = builder.compile()
\ No newline at end of file
+# A local SQLite store when MEMORY_STORE_PATH is set; otherwise the server provides the store
+graph = builder.compile(store=store_from_env())
\ No newline at end of file
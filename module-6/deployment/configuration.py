@@ -12,6 +12,8 @@ class Configuration:
     user_id: str = "default-user"
     todo_category: str = "general" 
     task_maistro_role: str = "You are a helpful task management assistant. You help you create, organize, and manage the user's ToDo list."
+    memory_write_mode: str = "sync" # "sync" writes memories before the run ends, "background" queues them to run after the reply
+    extraction_overlap: int = 4 # Messages before a thread's extraction watermark that are re-sent to Trustcall for context
 
     @classmethod
     def from_runnable_config(
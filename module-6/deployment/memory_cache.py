@@ -0,0 +1,149 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langgraph.store.base import BaseStore, Item, PutOp, SearchOp
+
+class _Entry:
+    __slots__ = ("version", "loaded_at", "items", "fragments")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.loaded_at = 0.0
+        self.items: Optional[List[Item]] = None
+        self.fragments: Dict[str, Tuple[List[Item], str]] = {}
+
+class _StoreCache:
+    """ The cached namespaces of one store, least recently used first """
+
+    __slots__ = ("entries", "floor")
+
+    def __init__(self):
+        self.entries: "OrderedDict[Tuple[str, ...], _Entry]" = OrderedDict()
+        # Version of namespaces without an entry. Evicting an entry raises it past the entry's
+        # version, so a read that started before the eviction can never be cached as current
+        self.floor = 0
+
+    def version(self, namespace: Tuple[str, ...]) -> int:
+        entry = self.entries.get(namespace)
+        return self.floor if entry is None else entry.version
+
+class NamespaceCache:
+    """Per-process read-through cache of store.search() results, keyed by store and namespace.
+
+    Each namespace has a version that put() bumps, which drops the cached
+    items and every fragment rendered from them, so writes made through
+    the cache are visible on the next read. Fragments are strings rendered
+    from a namespace's items (e.g. the ToDo block of the system prompt) and
+    are cached alongside them under the same version.
+
+    Every store has its own entries, held only as long as the store itself.
+    At most max_namespaces namespaces are kept per store, least recently
+    used first out, and expired items are dropped when they are next read.
+    Writes from other processes are picked up once an entry is older than
+    ttl seconds (None never expires).
+    """
+
+    def __init__(self, ttl: Optional[float] = 30.0, max_namespaces: int = 1024):
+        self.ttl = ttl
+        self.max_namespaces = max_namespaces
+        self._lock = threading.Lock()
+        self._stores: "weakref.WeakKeyDictionary[BaseStore, _StoreCache]" = weakref.WeakKeyDictionary()
+
+    def _cache(self, store: BaseStore) -> _StoreCache:
+        cache = self._stores.get(store)
+        if cache is None:
+            cache = self._stores[store] = _StoreCache()
+        return cache
+
+    def _entry(self, cache: _StoreCache, namespace: Tuple[str, ...]) -> _Entry:
+        """ The namespace's entry, created if needed and marked as most recently used """
+        entry = cache.entries.get(namespace)
+        if entry is None:
+            entry = cache.entries[namespace] = _Entry(cache.floor)
+            while len(cache.entries) > self.max_namespaces:
+                _, evicted = cache.entries.popitem(last=False)
+                cache.floor = max(cache.floor, evicted.version + 1)
+        else:
+            cache.entries.move_to_end(namespace)
+        return entry
+
+    def _fresh(self, cache: _StoreCache, namespace: Tuple[str, ...]) -> Optional[List[Item]]:
+        entry = cache.entries.get(namespace)
+        if entry is None or entry.items is None:
+            return None
+        if self.ttl is not None and time.monotonic() - entry.loaded_at > self.ttl:
+            entry.items = None
+            entry.fragments.clear()
+            return None
+        cache.entries.move_to_end(namespace)
+        return entry.items
+
+    def search(self, store: BaseStore, namespace: Tuple[str, ...]) -> List[Item]:
+        """ store.search(namespace), served from the cache while the namespace is unchanged """
+        return self.search_many(store, [namespace])[0]
+
+    def search_many(self, store: BaseStore, namespaces: Sequence[Tuple[str, ...]]) -> List[List[Item]]:
+        """ search() for several namespaces, fetching every cache miss in one store.batch() round trip """
+        with self._lock:
+            cache = self._cache(store)
+            results = [self._fresh(cache, namespace) for namespace in namespaces]
+            versions = [cache.version(namespace) for namespace in namespaces]
+        missing = [i for i, items in enumerate(results) if items is None]
+        if not missing:
+            return results
+
+        fetched = store.batch([SearchOp(namespaces[i]) for i in missing])
+        now = time.monotonic()
+        with self._lock:
+            for i, items in zip(missing, fetched):
+                results[i] = items
+                # Only cache if no put() landed (and no eviction happened) while we were reading
+                if cache.version(namespaces[i]) == versions[i]:
+                    entry = self._entry(cache, namespaces[i])
+                    entry.loaded_at, entry.items = now, items
+                    entry.fragments.clear()
+        return results
+
+    def render(self, store: BaseStore, namespace: Tuple[str, ...], name: str, render: Callable[[List[Item]], str]) -> str:
+        """ render(items) for the namespace, re-rendered only when its items were reloaded """
+        items = self.search(store, namespace)
+        with self._lock:
+            entry = self._cache(store).entries.get(namespace)
+            cached = entry.fragments.get(name) if entry is not None else None
+        # A fragment is valid for exactly the item list it was rendered from
+        if cached is not None and cached[0] is items:
+            return cached[1]
+        fragment = render(items)
+        with self._lock:
+            entry = self._cache(store).entries.get(namespace)
+            if entry is not None and entry.items is items:
+                entry.fragments[name] = (items, fragment)
+        return fragment
+
+    def put(self, store: BaseStore, namespace: Tuple[str, ...], key: str, value: dict):
+        """ store.put() that also invalidates the namespace """
+        self.put_many(store, namespace, [(key, value)])
+
+    def put_many(self, store: BaseStore, namespace: Tuple[str, ...], items: Iterable[Tuple[str, dict]]):
+        """ Write (key, value) pairs in one store.batch() round trip, then invalidate the namespace """
+        ops = [PutOp(namespace, key, value) for key, value in items]
+        if ops:
+            store.batch(ops)
+            self.invalidate(store, namespace)
+
+    def invalidate(self, store: BaseStore, namespace: Tuple[str, ...]):
+        with self._lock:
+            entry = self._entry(self._cache(store), namespace)
+            entry.version += 1
+            entry.items = None
+            entry.fragments.clear()
+
+    def clear(self):
+        with self._lock:
+            for cache in self._stores.values():
+                for entry in cache.entries.values():
+                    cache.floor = max(cache.floor, entry.version + 1)
+                cache.entries.clear()
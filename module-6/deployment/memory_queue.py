@@ -0,0 +1,67 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class MemoryWriteQueue:
+    """Background queue for memory extraction and store writes, run after the reply.
+
+    Jobs for the same user run one at a time, in the order they were first
+    queued, so a later update never lands before an earlier one. Different
+    users run in parallel on the worker pool. A job that is still waiting
+    is coalesced with a newer job of the same kind for the same user: the
+    newer arguments replace the older ones, since the newer chat history
+    already contains everything the older one did. Callers include the
+    thread id in the kind so that only writes from the same conversation
+    are coalesced.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="memory-write")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending: Dict[Hashable, "OrderedDict[Hashable, tuple]"] = {} # user -> kind -> (fn, args, kwargs)
+        self._active = set() # Users with a drain loop scheduled or running
+        self.coalesced = 0
+
+    def submit(self, user: Hashable, kind: Hashable, fn: Callable, *args, **kwargs):
+        """ Queue fn(*args, **kwargs) for user, replacing a waiting job of the same kind """
+        with self._lock:
+            jobs = self._pending.setdefault(user, OrderedDict())
+            if kind in jobs:
+                self.coalesced += 1
+            # Replacing keeps the job's original place in the user's order
+            jobs[kind] = (fn, args, kwargs)
+            if user not in self._active:
+                self._active.add(user)
+                self._pool.submit(self._drain, user)
+
+    def run(self, background: bool, user: Hashable, kind: Hashable, fn: Callable, *args, **kwargs) -> Optional[object]:
+        """ Queue the job if background, else run it now and return its result """
+        if background:
+            self.submit(user, kind, fn, *args, **kwargs)
+            return None
+        return fn(*args, **kwargs)
+
+    def _drain(self, user: Hashable):
+        while True:
+            with self._lock:
+                jobs = self._pending.get(user)
+                if not jobs:
+                    self._pending.pop(user, None)
+                    self._active.discard(user)
+                    self._idle.notify_all()
+                    return
+                kind, (fn, args, kwargs) = jobs.popitem(last=False)
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("Background memory write %r for %r failed", kind, user)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """ Wait until every queued job has run; returns False on timeout """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._active, timeout=timeout)
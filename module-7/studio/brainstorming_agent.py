@@ -13,6 +13,9 @@ from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph.message import add_messages
 
+from singleflight import SingleFlight, normalize_query
+from sqlite_store import store_from_env
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -30,6 +33,9 @@ _set_env("OPENAI_API_KEY")
 # LLM
 llm = ChatOpenAI(model="gpt-4o")
 
+# Concurrent sessions asking the same thing share one in-flight search
+search_flight = SingleFlight()
+
 # Tools
 @tool
 def browse_web(query: str) -> str:
@@ -37,7 +43,7 @@ def browse_web(query: str) -> str:
     from tavily import TavilyClient
     client = TavilyClient(api_key=os.environ.get("TAVILY_API_KEY"))
     try:
-        response = client.search(query=query)
+        response = search_flight.do(("browse_web", normalize_query(query)), client.search, query=query)
         results = response.get("results", [])
         if results:
             return "\n".join([f"{r['title']}: {r['content']}" for r in results[:3]])
@@ -62,7 +68,7 @@ def deep_research(query: str, depth: str = "medium") -> str:
         # Step 1: Initial search to get broad results
         print(f"🔍 Starting deep research for: '{query}' (depth: {depth})")
 
-        initial_response = client.search(query=query, max_results=5)
+        initial_response = search_flight.do(("deep_research", normalize_query(query)), client.search, query=query, max_results=5)
         initial_results = initial_response.get("results", [])
 
         if not initial_results:
@@ -554,7 +560,8 @@ builder.add_conditional_edges("assistant", tools_condition)
 builder.add_edge("tools", "assistant")
 builder.add_edge("human", "assistant")  # Allow human to loop back to assistant
 
-graph = builder.compile()
+# A local SQLite store when MEMORY_STORE_PATH is set; otherwise the server provides the store
+graph = builder.compile(store=store_from_env())
 
 # For Studio - this will be the entry point
 def main():
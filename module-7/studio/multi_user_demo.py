@@ -8,21 +8,24 @@ from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
-from typing import List
+from typing import List, Optional
 
 # Import our agent
 from brainstorming_agent import (
     BrainstormState, assistant, human_in_loop, tools,
     generate_prd, read_prd
 )
+from sqlite_store import store_from_env
 
 class MultiUserBrainstormingAgent:
     """Multi-user agent with proper session isolation"""
 
-    def __init__(self):
-        # Memory store for long-term memory (user-specific data)
-        self.store = InMemoryStore()
+    def __init__(self, store: Optional[BaseStore] = None):
+        # Memory store for long-term memory (user-specific data): the given store,
+        # else a durable SQLite store if MEMORY_STORE_PATH is set, else in memory
+        self.store = store or store_from_env() or InMemoryStore()
 
         # Checkpointer for short-term memory (conversation state)
         self.checkpointer = MemorySaver()
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    MatchCondition,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+# Namespace labels may not contain ".", so it can join them. Every stored prefix ends with
+# the separator, so a namespace and all of its children are one contiguous range of the
+# primary key: [prefix + ".", prefix + "/"), "/" being the character after ".".
+SEP = "."
+SEP_NEXT = "/"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, key)
+) WITHOUT ROWID;
+"""
+
+def encode_namespace(namespace: Tuple[str, ...]) -> str:
+    return "".join(label + SEP for label in namespace)
+
+def decode_namespace(prefix: str) -> Tuple[str, ...]:
+    return tuple(prefix.split(SEP)[:-1])
+
+def prefix_range(namespace_prefix: Tuple[str, ...]) -> Tuple[str, Optional[str]]:
+    """ Bounds on the prefix column for a namespace and everything below it """
+    if not namespace_prefix:
+        return "", None
+    low = encode_namespace(namespace_prefix)
+    return low, low[:-1] + SEP_NEXT
+
+def _compare(value: Any, condition: Any) -> bool:
+    """ Match a value against a search filter, with the operators the other stores accept """
+    if isinstance(condition, dict):
+        if any(key.startswith("$") for key in condition):
+            return all(_apply_operator(value, op, operand) for op, operand in condition.items())
+        return isinstance(value, dict) and all(_compare(value.get(k), v) for k, v in condition.items())
+    return value == condition
+
+def _apply_operator(value: Any, op: str, operand: Any) -> bool:
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if value is None:
+        return False
+    if op == "$gt":
+        return float(value) > float(operand)
+    if op == "$gte":
+        return float(value) >= float(operand)
+    if op == "$lt":
+        return float(value) < float(operand)
+    if op == "$lte":
+        return float(value) <= float(operand)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def _matches(namespace: Tuple[str, ...], condition: MatchCondition) -> bool:
+    path = tuple(condition.path)
+    if len(namespace) < len(path):
+        return False
+    labels = namespace[:len(path)] if condition.match_type == "prefix" else namespace[len(namespace) - len(path):]
+    return all(p == "*" or p == label for p, label in zip(path, labels))
+
+class SqliteStore(BaseStore):
+    """Durable BaseStore on a single SQLite file, for local and single-node deployments.
+
+    The database runs in WAL mode, so readers in other processes (e.g. the
+    consolidation job) never block the agent's writes. Items live in one
+    table whose primary key is (prefix, key), prefix being the encoded
+    namespace, so a get, a namespace search and a namespace-prefix search
+    are all range scans of that one index. Searches return the newest
+    items first.
+
+    Values are stored as JSON, zlib-compressed when they are at least
+    compress_threshold bytes (None stores them uncompressed). Each batch()
+    runs in one transaction: puts are applied first, then the reads, which
+    therefore see the batch's own writes. Semantic search (index=...) is
+    not supported; a query is ignored and results are ordered by recency.
+    """
+
+    supports_ttl = False
+
+    def __init__(self, path: str = ":memory:", compress_threshold: Optional[int] = None):
+        self.path = path
+        self.compress_threshold = compress_threshold
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    @contextmanager
+    def from_conn_string(cls, path: str, **kwargs) -> Iterator["SqliteStore"]:
+        store = cls(path, **kwargs)
+        try:
+            yield store
+        finally:
+            store.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    ## Encoding
+
+    def _dump(self, value: Dict[str, Any]) -> Tuple[bytes, int]:
+        data = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        if self.compress_threshold is not None and len(data) >= self.compress_threshold:
+            return zlib.compress(data), 1
+        return data, 0
+
+    @staticmethod
+    def _load(data: bytes, compressed: int) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(data) if compressed else data)
+
+    @classmethod
+    def _item(cls, row: tuple, search: bool = False) -> Item:
+        prefix, key, data, compressed, created_at, updated_at = row
+        fields = dict(namespace=decode_namespace(prefix), key=key, value=cls._load(data, compressed),
+                      created_at=datetime.fromisoformat(created_at), updated_at=datetime.fromisoformat(updated_at))
+        return SearchItem(**fields) if search else Item(**fields)
+
+    ## Operations
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops = list(ops)
+        results: List[Result] = [None] * len(ops)
+        with self._lock:
+            # Last write wins for each item, as in the other stores
+            puts = {(op.namespace, op.key): op for op in ops if isinstance(op, PutOp)}
+            cursor = self.conn.cursor()
+            # Take the write lock up front for batches that write, so the reads and writes can't deadlock
+            cursor.execute("BEGIN IMMEDIATE" if puts else "BEGIN")
+            try:
+                if puts:
+                    self._put(cursor, list(puts.values()))
+                gets = [(i, op) for i, op in enumerate(ops) if isinstance(op, GetOp)]
+                if gets:
+                    self._get(cursor, gets, results)
+                for i, op in enumerate(ops):
+                    if isinstance(op, SearchOp):
+                        results[i] = self._search(cursor, op)
+                    elif isinstance(op, ListNamespacesOp):
+                        results[i] = self._list_namespaces(cursor, op)
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.batch, list(ops))
+
+    def _put(self, cursor: sqlite3.Cursor, ops: List[PutOp]):
+        now = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        deletes = [(encode_namespace(op.namespace), op.key) for op in ops if op.value is None]
+        upserts = [(encode_namespace(op.namespace), op.key, *self._dump(op.value), now, now)
+                   for op in ops if op.value is not None]
+        if deletes:
+            cursor.executemany("DELETE FROM store WHERE prefix = ? AND key = ?", deletes)
+        if upserts:
+            cursor.executemany(
+                "INSERT INTO store (prefix, key, value, compressed, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (prefix, key) DO UPDATE SET value = excluded.value, "
+                "compressed = excluded.compressed, updated_at = excluded.updated_at",
+                upserts,
+            )
+
+    def _get(self, cursor: sqlite3.Cursor, gets: List[Tuple[int, GetOp]], results: List[Result]):
+        # One query per namespace, fetching all of its requested keys
+        by_namespace: Dict[str, List[Tuple[int, str]]] = {}
+        for i, op in gets:
+            by_namespace.setdefault(encode_namespace(op.namespace), []).append((i, op.key))
+        for prefix, requests in by_namespace.items():
+            keys = list({key for _, key in requests})
+            found = {}
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = cursor.execute(
+                    "SELECT prefix, key, value, compressed, created_at, updated_at FROM store "
+                    f"WHERE prefix = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    [prefix, *chunk],
+                )
+                found.update((row[1], self._item(row)) for row in rows)
+            for i, key in requests:
+                results[i] = found.get(key)
+
+    def _search(self, cursor: sqlite3.Cursor, op: SearchOp) -> List[SearchItem]:
+        low, high = prefix_range(op.namespace_prefix)
+        where, params = "prefix >= ?", [low]
+        if high is not None:
+            where, params = "prefix >= ? AND prefix < ?", [low, high]
+        sql = ("SELECT prefix, key, value, compressed, created_at, updated_at FROM store "
+               f"WHERE {where} ORDER BY updated_at DESC, prefix, key")
+
+        if not op.filter:
+            rows = cursor.execute(sql + " LIMIT ? OFFSET ?", [*params, op.limit, op.offset])
+            return [self._item(row, search=True) for row in rows]
+
+        # Values may be compressed, so filters are applied after decoding
+        items = []
+        skipped = 0
+        for row in cursor.execute(sql, params):
+            item = self._item(row, search=True)
+            if not all(_compare(item.value.get(key), condition) for key, condition in op.filter.items()):
+                continue
+            if skipped < op.offset:
+                skipped += 1
+                continue
+            items.append(item)
+            if len(items) == op.limit:
+                break
+        return items
+
+    def _list_namespaces(self, cursor: sqlite3.Cursor, op: ListNamespacesOp) -> List[Tuple[str, ...]]:
+        # A literal leading prefix condition narrows the scan to its range of the index
+        conditions = list(op.match_conditions or ())
+        low, high = "", None
+        for condition in conditions:
+            if condition.match_type == "prefix" and "*" not in condition.path:
+                low, high = prefix_range(tuple(condition.path))
+                conditions.remove(condition)
+                break
+        where, params = "prefix >= ?", [low]
+        if high is not None:
+            where, params = "prefix >= ? AND prefix < ?", [low, high]
+        sql = f"SELECT DISTINCT prefix FROM store WHERE {where} ORDER BY prefix"
+
+        # Namespaces are listed in the order of their encoded prefix, which the index already has,
+        # so without other conditions SQLite can page through it directly
+        if not conditions and op.max_depth is None:
+            rows = cursor.execute(sql + " LIMIT ? OFFSET ?", [*params, op.limit, op.offset])
+            return [decode_namespace(prefix) for (prefix,) in rows]
+
+        namespaces = {}
+        for (prefix,) in cursor.execute(sql, params):
+            namespace = decode_namespace(prefix)
+            if all(_matches(namespace, condition) for condition in conditions):
+                namespace = namespace[:op.max_depth] if op.max_depth is not None else namespace
+                namespaces.setdefault(namespace, None)
+        return list(namespaces)[op.offset:op.offset + op.limit]
+
+@lru_cache(maxsize=None)
+def _open(path: str, compress_threshold: Optional[int]) -> SqliteStore:
+    return SqliteStore(path, compress_threshold=compress_threshold)
+
+def store_from_env() -> Optional[SqliteStore]:
+    """ The SqliteStore at $MEMORY_STORE_PATH, shared by every graph in the process, or None.
+
+    Compile graphs with store=store_from_env() to keep memories in a local SQLite file
+    when they run outside the LangGraph server; with the variable unset (or under the
+    server, which provides its own store) nothing changes. $MEMORY_STORE_COMPRESS_THRESHOLD
+    turns on compression of values of at least that many bytes.
+    """
+    path = os.environ.get("MEMORY_STORE_PATH")
+    if not path:
+        return None
+    threshold = os.environ.get("MEMORY_STORE_COMPRESS_THRESHOLD")
+    return _open(path, int(threshold) if threshold else None)